@@ -1,30 +1,124 @@
 #!/usr/bin/env python3
 
 import argparse
+from collections import Counter, OrderedDict
+import copy
+import csv
 from functools import reduce
+import hashlib
+import json
+import math
 import operator
 import os
 import re
+import shutil
+import sqlite3
+import struct
 import sys
 from textwrap import wrap
+import time
 import toml
+import zlib
 from wand.color import Color
 from wand.drawing import Drawing
 from wand.image import Image
 
+# Fitted text layouts, shared by all cards of a build. Keys contain the resolved text, the font style, the available
+# space and the starting offset, so identical texts (conditions, type lines, keywords) are only fitted once per deck.
+text_layout_cache = {}
+
+# Tokenized meta tag templates (see compile_meta_template), reused across all cards of a build
+meta_templates = {}
+
+# Maximum amount of fitted text layouts and meta tag templates kept by a render server worker (see render_blueprint)
+worker_cache_size = 4096
+
+# Resolved meta tag values of the currently built card, one dictionary per language
+meta_values = {}
+
+# Texts of the currently built card by their space-separated paths, one dictionary per language; translated catalogs
+# already contain the untranslated texts as fallbacks (see get_card_content)
+text_catalog = {}
+
+# Parsed font, layout and icon set presets, shared by all cards of a build: path -> (modification time, preset)
+presets = {}
+
+# Recently decoded images (templates, card images), least recently used first
+image_cache = OrderedDict()
+image_cache_size = 16
+
+# Prepared icons and pre-rendered number tiles of array modules (see load_icon and render_text_tile), least recently
+# used first
+icon_cache = OrderedDict()
+icon_cache_size = 128
+tile_cache = OrderedDict()
+tile_cache_size = 256
+
+# Output format of build messages ('text' or 'jsonl'), the context added to each event (card, language) and the
+# cache hits counted since the last reported stage
+log_format = 'text'
+log_context = {}
+cache_hits = Counter()
+
+# High resolution mode: factor applied to all layout coordinates and font sizes, and to images delivered at the
+# resolution of the layout's template file
+render_scale = 1.0
+asset_scale = 1.0
+
+# Warnings already reported while rendering a card in bands (None outside of render_card_bands): each band renders
+# the modules it intersects, so the same warning would be reported once per band
+band_warnings = None
+
+# Pixel digests of all outputs inside the dist directory: digest -> {file, size, mtime}
+output_index = {}
+
 
 def cl_main() -> None:
     """Entrypoint of command line interface."""
 
+    if len(sys.argv) > 1 and sys.argv[1] == 'serve':
+        from cardmage.server import serve_main
+        serve_main(sys.argv[2:])
+        return
+
+    if len(sys.argv) > 1 and sys.argv[1] == 'snapshot':
+        from cardmage.snapshot import snapshot_main
+        snapshot_main(sys.argv[2:])
+        return
+
     arg_parser = argparse.ArgumentParser(description='Cardmage open-source card builder')
-    arg_parser.add_argument("path", nargs="*", help="Path to one or more card's root TOML file. Leave empty to build "
-                                                    "all root files found in the card directory")
-    arg_parser.add_argument("-l", "--languages", help="Render card translations", default=False, action="store_true")
+    arg_parser.add_argument("path", nargs="*", help="Path to one or more card's root TOML file (or the names/codes of "
+                                                    "cards inside a bulk card source). Leave empty to build all root "
+                                                    "files found in the card directory")
+    arg_parser.add_argument("-l", "--languages", help="Render card translations", default=None,
+                            action="store_const", const=set())
+    arg_parser.add_argument("--only-languages", help="Render only the given card translations (comma-separated, "
+                                                     "e.g. 'de,fr')", default=None, type=language_spec,
+                            action="store")
     arg_parser.add_argument("-p", "--print", help="Optimize card for print (CMYK + export as TIF format)",
                             default=False, action="store_true")
     arg_parser.add_argument("-f", "--format", help="Choose the outputs file format", default="png",
                             choices=["png", "tif", "qoi"], action="store")
     arg_parser.add_argument("-t", "--test", help="Use test settings", default=False, action="store_true")
+    arg_parser.add_argument("--log-format", help="Report the build progress as human-readable text or as one JSON "
+                                                 "event per line", default="text", choices=["text", "jsonl"],
+                            action="store")
+    arg_parser.add_argument("--scale", help="Render in high resolution: scales the layout by the given DPI factor "
+                                            "and renders the card in horizontal bands (PNG and TIF only)", default=1.0,
+                            type=positive_float, action="store")
+    arg_parser.add_argument("--band-height", help="Height of the bands rendered in high resolution mode (in pixels)",
+                            default=512, type=positive_int, action="store")
+    arg_parser.add_argument("-s", "--source", help="Load all cards from a single CSV, JSON(L) or SQLite file "
+                                                   "instead of the card directory", action="store")
+    arg_parser.add_argument("-q", "--query", help="Only build bulk source cards whose entry at PATH equals VALUE "
+                                                  "(repeatable)", metavar="PATH=VALUE", action="append", default=[])
+    arg_parser.add_argument("--shard", help="Render only the K-th of N deterministic, cost-balanced parts of the deck "
+                                            "and write a partial manifest", metavar="K/N", type=shard_spec)
+    arg_parser.add_argument("--merge-shards", help="Verify that the partial manifests of all N shards cover the deck "
+                                                   "exactly once and merge them", metavar="N", default=None,
+                            type=positive_int)
+    arg_parser.add_argument("--dist", help="Directory the outputs are written to (default: the project's 'dist' "
+                                           "directory)", default=None, action="store")
 
     args = arg_parser.parse_args()
 
@@ -34,149 +128,385 @@ def cl_main() -> None:
     global font
     global icons
     global layout
+    global log_format
+    global render_scale
     global settings
     global translations
 
     build_no = 1
+    build_start = time.perf_counter()
+    log_format = args.log_format
+    render_scale = args.scale
+    banded = args.scale != 1.0
+
+    # args.languages: None (no translations), an empty set (all languages) or the requested languages
+    if args.only_languages:
+        args.languages = args.only_languages
 
     if args.test:
         try:
             settings = toml.load(dir_path("../testdata/settings.toml"))
         except FileNotFoundError:
-            print("The test settings file could not be loaded (file does not exist).")
+            log_event('error', "The test settings file could not be loaded (file does not exist).")
             sys.exit(0)
     else:
         try:
             settings = toml.load(dir_path("./settings.toml"))
         except FileNotFoundError:
-            print("The projects' settings file could not be loaded (file does not exist).")
+            log_event('error', "The projects' settings file could not be loaded (file does not exist).")
             sys.exit(0)
         except toml.TomlDecodeError:
-            print("The projects' settings file could not be loaded (wrong file format).")
+            log_event('error', "The projects' settings file could not be loaded (wrong file format).")
             sys.exit(0)
 
     base_dir = settings['paths']['base']
-    distpath = os.path.join(base_dir, 'dist/')
+    distpath = os.path.join(args.dist or os.path.join(base_dir, 'dist'), '')
 
     if not os.path.exists(distpath):
-        os.mkdir(distpath)
+        os.makedirs(distpath)
 
-    if len(args.path) == 0:
-        args.path = os.listdir(base_dir + settings['paths']['cards'])
+    if args.merge_shards:
+        sys.exit(merge_shard_manifests(args.merge_shards))
 
-        if len(args.path) == 0:
-            print("No definition files found inside the card directory; therefore nothing to do.")
+    if banded and args.format == 'qoi' and not args.print:
+        log_event('warning', "NOTICE: QOI outputs can't be written in bands; rendering whole cards instead",
+                  kind='bands_unsupported', format=args.format)
+
+    if args.source:
+        try:
+            queries = [query_spec(query) for query in args.query]
+            deck = []
+            indexed = set()
+            costs = dict()
+
+            # index pass: only names (and costs) are kept, the records themselves are streamed again while building
+            for card, card_data, card_translations in read_bulk_cards(dir_path(args.source), queries):
+                if card in indexed:
+                    log_event('warning', f"  - NOTICE: Card '{card}' is defined more than once in '{args.source}'; "
+                              "skipping", kind='duplicate_card', card=card)
+                elif len(args.path) == 0 or card in args.path:
+                    deck.append(card)
+                    indexed.add(card)
+
+                    if args.shard:
+                        costs[card] = estimate_build_cost(card, args.languages, card_data, card_translations)
+
+        except FileNotFoundError:
+            log_event('error', f"The bulk card source '{args.source}' could not be loaded (file does not exist).")
+            sys.exit(0)
+        except (ValueError, sqlite3.Error) as error:
+            log_event('error', f"The bulk card source '{args.source}' could not be loaded ({error}).")
+            sys.exit(0)
+
+        for card in args.path:
+            if card not in indexed:
+                log_event('warning', f"  - NOTICE: Card '{card}' not found in '{args.source}'; skipping",
+                          kind='missing_card', card=card)
+
+        if len(deck) == 0:
+            log_event('error', "No matching cards found inside the bulk card source; therefore nothing to do.")
             sys.exit(0)
 
-    builds_total = len(args.path)
+    else:
+        if len(args.path) == 0:
+            args.path = sorted(os.listdir(base_dir + settings['paths']['cards']))
+
+            if len(args.path) == 0:
+                log_event('error', "No definition files found inside the card directory; therefore nothing to do.")
+                sys.exit(0)
+
+        deck = list(args.path)
+        costs = dict()
+
+        if args.shard:
+            costs = {card: estimate_build_cost(card, args.languages) for card in deck}
+
+    outputs = dict()
+    duplicates = dict()
+    rendered_languages = set()
+    failed = []
+    selected = deck
+    load_output_index()
+
+    if args.shard:
+        selected = partition_cards(deck, costs, args.shard[0], args.shard[1])
+        log_event('shard', f"Shard {args.shard[0]}/{args.shard[1]}: {len(selected)} of {len(deck)} cards assigned.",
+                  shard=args.shard[0], shards=args.shard[1], cards=len(selected), deck=len(deck))
+
+    if args.source:
+        selection = set(selected)
+        cards = (entry for entry in read_bulk_cards(args.source, queries) if entry[0] in selection)
+    else:
+        cards = ((card, None, None) for card in selected)
+
+    builds_total = len(selected)
+
+    for card, card_data, card_translations in cards:
+        if card in outputs:
+            continue
 
-    for card in args.path:
         has_translations = False
+        outputs[card] = []
+        log_context.clear()
+        log_context.update(card=card)
+        card_start = time.perf_counter()
+        cache_hits.clear()
 
         try:
-            blueprint = toml.load(dir_path(base_dir + settings['paths']['cards'] + card))
-            print(f"[{str(build_no)}/{str(builds_total)}] Build '{resolve_meta_tags(blueprint['card']['code'])}' started.")
+            if card_data is None:
+                blueprint = toml.load(dir_path(base_dir + settings['paths']['cards'] + card))
+            else:
+                blueprint = card_data
+
+            meta_values.clear()
+            text_catalog.clear()
+            log_event('card_started', f"[{str(build_no)}/{str(builds_total)}] Build "
+                                      f"'{resolve_meta_tags(blueprint['card']['code'])}' started.",
+                      code=resolve_meta_tags(blueprint['card']['code']), build_no=build_no, builds_total=builds_total)
 
             # 2. Load the necessary preset .toml files based on blueprint data (fonts, layouts)
-            font = toml.load(dir_path(base_dir + settings['paths']['fonts'] + blueprint['card']['font'] + ".toml"))
-            layout = toml.load(dir_path(base_dir + settings['paths']['layouts'] + blueprint['layout']['type'] + ".toml"))
-            icons = toml.load(dir_path(base_dir + settings['paths']['icons'] + layout['icons']['set'] + ".toml"))
+            font = load_preset(base_dir + settings['paths']['fonts'] + blueprint['card']['font'] + ".toml")
+            layout = load_preset(base_dir + settings['paths']['layouts'] + blueprint['layout']['type'] + ".toml")
+            icons = load_preset(base_dir + settings['paths']['icons'] + layout['icons']['set'] + ".toml")
+
+            if banded:
+                layout = scale_layout(layout, render_scale)
 
-            if args.languages and os.path.exists(base_dir + settings['paths']['translations'] + card):
+            # translations are only loaded if at least one of the card's languages is requested
+            if args.languages is not None:
+                wanted = [language for language in blueprint['card']['translations']
+                          if not args.languages or language.lower() in args.languages]
+            else:
+                wanted = []
+
+            if wanted and card_data is not None:
+                if card_translations is not None:
+                    translations = dict(translations=card_translations)
+                    has_translations = True
+
+            elif wanted and os.path.exists(base_dir + settings['paths']['translations'] + card):
                 try:
                     translations = toml.load(base_dir + settings['paths']['translations'] + card)
                 except toml.TomlDecodeError:
-                    print(f"  - Translation for '{card}': Wrong file format. Skipping translations...")
+                    log_event('warning', f"  - Translation for '{card}': Wrong file format. Skipping translations...",
+                              kind='invalid_translation_file')
                 else:
-                    if len(blueprint["card"]["translations"]) > 0:
-                        has_translations = True
+                    has_translations = True
 
-            template = Image(filename=dir_path(base_dir + settings['paths']['layouts'] + layout['template']['file']))
+            template, card_image = load_card_images()
+            log_stage('load', card_start)
 
-            if layout['image']['use_vertical']:
-                card_image = Image(
-                    filename=dir_path(base_dir + settings['paths']['images'] + blueprint['image']['source_vertical']))
-            else:
-                card_image = Image(
-                    filename=dir_path(base_dir + settings['paths']['images'] + blueprint['image']['source']))
+            iteration = 0
+
+            # 3. Use wand to construct the final card and its translated variants
+            while iteration <= len(blueprint['card']["translations"]):
+                language = ""
+
+                iteration += 1
+
+                if not has_translations and iteration > 1:
+                    break
+
+                if has_translations and iteration > 1:
+                    language = blueprint['card']["translations"][iteration - 2].lower()
+
+                    if language not in translations["translations"]:
+                        continue
+
+                    if args.languages and language not in args.languages:
+                        continue
+
+                    rendered_languages.add(language)
+
+                log_context['language'] = language
+                name_modifier = "."
+
+                if args.print:
+                    args.format = "tif"
+                    name_modifier = "-cmyk."
+
+                filename = resolve_meta_tags(blueprint['card']['code'], language=language) + name_modifier + args.format
+                stage_start = time.perf_counter()
+
+                if banded and args.format in ['png', 'tif']:
+                    # bands are rendered while the encoder consumes them, so encoding is part of the render stage
+                    bands = render_card_bands(template, card_image, language, args.band_height, args.print)
+                    original = save_output_bands(bands, filename, args.format, layout['template']['size'][0],
+                                                 layout['template']['size'][1], args.print,
+                                                 layout['template'].get('dpi', 300) * render_scale)
+                    log_stage('render', stage_start, banded=True)
+                    stage_start = time.perf_counter()
+                    current = None
+                elif asset_scale != 1.0:
+                    # high resolution without bands: the images are scaled for this card only
+                    scaled_template = crop_rows(template, 0, layout['template']['size'][1], asset_scale)
+                    scaled_image = crop_rows(card_image, 0, round(card_image.height * asset_scale), asset_scale)
+                    current = render_card(scaled_template, scaled_image, language)
+                    scaled_template.close()
+                    scaled_image.close()
+                    log_stage('render', stage_start)
+                else:
+                    current = render_card(template, card_image, language)
+                    log_stage('render', stage_start)
+
+                if current is not None:
+                    # 5. Save image in dist
+                    if args.print:
+                        current.transform_colorspace('cmyk')
+
+                    stage_start = time.perf_counter()
+                    original = save_output(current, filename, args.format)
+                    current.close()
+
+                outputs[card].append(filename)
+                log_stage('save', stage_start, file=filename, bytes=os.path.getsize(distpath + filename),
+                          linked_to=original or None)
+
+                if original:
+                    duplicates[filename] = original
+                    log_event('duplicate', f"  - '{filename}' is identical to '{original}'; linked instead of encoded "
+                                           "again", file=filename, linked_to=original)
 
         except FileNotFoundError as error:
-            print(error)
-            print(f"  - Build '{resolve_meta_tags(blueprint['card']['code'])}' failed.")
+            log_event('card_failed', f"{error}\n  - Build '{card}' failed.", error=str(error),
+                      duration_ms=elapsed_ms(card_start))
+            failed.append(card)
             build_no += 1
             continue
 
         except toml.TomlDecodeError:
-            print(f"  -{card}: Wrong file format...")
+            log_event('card_failed', f"  -{card}: Wrong file format...", error="wrong file format",
+                      duration_ms=elapsed_ms(card_start))
+            failed.append(card)
             build_no += 1
             continue
 
-        else:
-            iteration = 0
+        except Exception as error:
+            # any other error only fails the current card, the remaining cards are built anyway
+            log_event('card_failed', f"  - {card}: {error!r}\n  - Build '{card}' failed.", error=repr(error),
+                      duration_ms=elapsed_ms(card_start))
+            failed.append(card)
+            build_no += 1
+            continue
 
-            # 3. Use wand to construct the final card and its translated variants
-            while iteration <= len(blueprint['card']["translations"]):
-                language = ""
+        log_context.pop('language', None)
+        log_event('card_completed', f"  - Build '{resolve_meta_tags(blueprint['card']['code'])}' completed.",
+                  outputs=len(outputs[card]), duration_ms=elapsed_ms(card_start))
+        build_no += 1
 
-                if has_translations and iteration > 0:
-                    language = blueprint['card']["translations"][iteration - 1].lower()
+    log_context.clear()
 
-                    if language not in translations["translations"]:
-                        continue
+    for language in sorted((args.languages or set()) - rendered_languages):
+        log_event('warning', f"  - NOTICE: Requested language '{language}' is not available for any of the built cards",
+                  kind='unknown_language', language=language)
 
-                iteration += 1
+    log_event('build_completed', None, cards=len(outputs), failed=len(failed), duration_ms=elapsed_ms(build_start))
 
-                with Color(layout['template']['background']) as bg:
-                    current = Image(width=layout['template']['size'][0], height=layout['template']['size'][1],
-                                    background=bg)
-
-                with Drawing() as draw:
-                    hero = card_image.clone()
-                    layer = template.clone()
-                    draw.composite(operator='atop', left=layout['config']['image_zone'][0],
-                                   top=layout['config']['image_zone'][1], width=hero.width, height=hero.height,
-                                   image=hero)
-                    draw.composite(operator='atop', left=0, top=0, width=layer.width, height=layer.height, image=layer)
-
-                    # 4. Use wand to place text onto card
-                    draw.font = get_font_style('fontstyle', 'title', dict(), '_null_')
-                    draw.font_size = get_font_style('fontsize', 'title', dict(), '_null_')
-                    draw.fill_color = get_font_style('fontcolor', 'title', dict(), '_null_')
-                    draw.text_alignment = get_font_style('textalign', 'title', dict(), '_null_')
-
-                    if 'outline' in font['tags']['title']:
-                        draw.stroke_color = Color(font['tags']['title']['outline']['color'])
-                        draw.stroke_width = font['tags']['title']['outline']['width']
-
-                    offset_x = get_alignment_offset(draw.text_alignment, 'title')
-                    draw.text(layout['config']['title_zone'][0] + offset_x, layout['config']['title_zone'][1],
-                              get_card_content(language, "title"))
-                    draw(current)
-
-                    for module in blueprint['modules']:
-                        if module + '_zone' in layout['modules']:
-                            render_card_content(blueprint['modules'][module], module, draw, language=language)
+    if args.shard:
+        write_shard_manifest(args.shard, deck, outputs, duplicates, failed)
 
-                        else:
-                            print(f"  - NOTICE: Module '{module}' found, but the current layout specifies no"
-                                  " rendering zone for this module; skipping")
-                        continue
+    write_output_index()
 
-                    draw(current)
 
-                    # 5. Save image in dist
-                    name_modifier = "."
+def assets_mtime() -> int:
+    """
+    Returns the most recent modification time of all font, icon, image and layout files of the project.
 
-                    if args.print:
-                        args.format = "tif"
-                        name_modifier = "-cmyk."
-                        current.transform_colorspace('cmyk')
+    Returns
+    -------
+        int
+            The modification time in nanoseconds
+    """
+    mtime = 0
 
-                    current.save(filename=str(
-                        distpath + resolve_meta_tags(blueprint['card']['code'], language=language) + name_modifier + args.format))
+    for directory in ['fonts', 'icons', 'images', 'layouts']:
+        for root, _, files in os.walk(base_dir + settings['paths'][directory]):
+            for file in files:
+                mtime = max(mtime, os.stat(os.path.join(root, file)).st_mtime_ns)
 
-            print(f"  - Build '{resolve_meta_tags(blueprint['card']['code'])}' completed.")
-            build_no += 1
+    return mtime
+
+
+def compile_meta_template(string: str) -> tuple:
+    """
+    Splits a string into literal text fragments and meta tags. The result is cached, so each distinct template
+    string is only parsed once per build.
+
+    Parameters
+    ----------
+        string : str
+            The text to be checked for meta tags
+
+    Returns
+    -------
+        tuple
+            The template's tokens: literal strings and (tag, meta key) tuples
+    """
+    if string in meta_templates:
+        return meta_templates[string]
+
+    tokens = []
+
+    if '{' in string and '}' in string:
+        position = 0
+
+        for match in re.finditer(r'\{.*?}', string):
+            if match.start() > position:
+                tokens.append(string[position:match.start()])
+
+            tokens.append((match.group(), match.group().replace('{', '').replace('}', '')))
+            position = match.end()
+
+        if position < len(string):
+            tokens.append(string[position:])
+
+    else:
+        tokens.append(string)
+
+    meta_templates[string] = tuple(tokens)
+
+    return meta_templates[string]
+
+
+def crop_rows(image: Image, top: int, rows: int, scale=1.0):
+    """
+    Returns a horizontal slice of an image, optionally scaled. Only the source rows covered by the slice are resized,
+    so scaled images never have to be kept in memory as a whole.
+
+    Parameters
+    ----------
+        image : Image
+            The source image (is not modified)
+        top : int
+            The first row of the slice (in scaled coordinates)
+        rows : int
+            The amount of rows
+        scale : float
+            Factor the image is resized by (optional)
+
+    Returns
+    -------
+        Image | None
+            The slice as new wand.Image object or None if the slice doesn't contain any rows of the image
+    """
+    top = int(top)
+    bottom = min(round(image.height * scale), int(top + rows))
+
+    if rows <= 0 or top >= bottom:
+        return None
+
+    if scale == 1.0:
+        return image[0:image.width, top:bottom]
+
+    # a few neighbouring source rows are included, so the resampling filter sees the same pixels in every band
+    source_top = max(0, int(top / scale) - 2)
+    source_bottom = min(image.height, math.ceil(bottom / scale) + 2)
+
+    with image[0:image.width, source_top:source_bottom] as source:
+        source.resize(max(1, round(image.width * scale)), max(1, round((source_bottom - source_top) * scale)))
+        offset = round(source_top * scale)
+
+        return source[0:source.width, top - offset:min(source.height, bottom - offset)]
 
 
 def dir_path(string: str) -> str:
@@ -204,6 +534,222 @@ def dir_path(string: str) -> str:
         raise FileNotFoundError(string)
 
 
+def elapsed_ms(start: float) -> float:
+    """
+    Returns the time passed since the given time.perf_counter() value in milliseconds.
+
+    Parameters
+    ----------
+        start : float
+            The start time
+
+    Returns
+    -------
+        float
+            The elapsed time in milliseconds (rounded to 0.1 ms)
+    """
+    return round((time.perf_counter() - start) * 1000, 1)
+
+
+def estimate_build_cost(card: str, languages, card_data=None, card_translations=None) -> float:
+    """
+    Estimates the relative rendering cost of a card based on its amount of languages and text volume.
+
+    Parameters
+    ----------
+        card : str
+            The filename of the card's root TOML file (or the card's name inside a bulk card source)
+        languages : set | None
+            The requested languages (an empty set for all languages; None if no translations will be rendered)
+        card_data : dict
+            The card's definition, if it was loaded from a bulk card source (optional)
+        card_translations : dict
+            The card's translations, if it was loaded from a bulk card source (optional)
+
+    Returns
+    -------
+        float
+            The estimated cost (1.0 equals a single image without any text)
+    """
+    if card_data is not None:
+        data = card_data
+        has_translations = card_translations is not None
+    else:
+        try:
+            data = toml.load(dir_path(base_dir + settings['paths']['cards'] + card))
+        except (FileNotFoundError, toml.TomlDecodeError):
+            return 1.0
+
+        has_translations = os.path.exists(base_dir + settings['paths']['translations'] + card)
+
+    def text_volume(node) -> int:
+        """Sums up the length of all strings found in a (nested) card definition."""
+        if isinstance(node, str):
+            return len(node)
+        elif isinstance(node, dict):
+            return sum(text_volume(value) for value in node.values())
+        elif isinstance(node, list):
+            return sum(text_volume(value) for value in node)
+        else:
+            return 0
+
+    variants = 1
+
+    if languages is not None and has_translations:
+        variants += len([language for language in data.get('card', dict()).get('translations', [])
+                         if not languages or language.lower() in languages])
+
+    # roughly 250 characters of text take as long to fit and render as composing the card's images
+    return variants * (1 + text_volume(data) / 250)
+
+
+def find_output(digest: str):
+    """
+    Looks up an existing output with the given pixel digest.
+
+    Parameters
+    ----------
+        digest : str
+            The pixel digest of a rendered card (see save_output)
+
+    Returns
+    -------
+        str | None
+            The output's filename, if it still exists unchanged inside the dist directory
+    """
+    if digest not in output_index:
+        return None
+
+    try:
+        status = os.stat(distpath + output_index[digest]['file'])
+    except FileNotFoundError:
+        return None
+
+    if (status.st_size, status.st_mtime_ns) != (output_index[digest]['size'], output_index[digest]['mtime']):
+        return None
+
+    cache_hits['output'] += 1
+
+    return output_index[digest]['file']
+
+
+def fit_text_multiline(content: str, layer: Image, size: list, offset: list, render: Drawing, mod: float) -> tuple:
+    """
+    Calculates the text layout used by render_text_multiline without drawing anything.
+
+    Parameters
+    ----------
+        content : str
+            The text to be rendered
+        layer : Image
+            A wand.Image object used as a carrier for the rendering process of the current module
+        size : list
+            The size [x, y] of the module's zone the text is fitted into
+        offset : list
+            Contains the current rendering offset based on the modules base coordinates [x, y]
+        render : Drawing
+            A wand.Drawing object used for measuring the text
+        mod : float
+            Modifier used for increasing the 'Mode 2' threshold (see render_text_multiline)
+
+    Returns
+    -------
+        tuple
+            The text operations [font size, x, y, text], the updated rendering offset and the new offset values
+    """
+    new_offset = [0, 0]
+    text_ops = []
+    initial_size = render.font_size
+
+    # estimated amount of possible characters that can be rendered in the current rendering zone
+    chars_line = int(size[0] / (0.75 * render.font_size)) * mod
+    lines_max = int((size[1] - offset[1]) / (1.2 * render.font_size))
+    chars_max = (lines_max - 1) * chars_line
+
+    if offset[0] == 0 or render.text_alignment != 'left' or len(content) > chars_max:
+        if offset[0] > 0 and render.text_alignment == 'left':
+            offset[0] = 0
+            offset[1] += new_offset[1] + int(render.font_size * 0.25)
+
+        textdata = word_wrap(layer, render, content, size[0], size[1] - offset[1])
+        content = textdata[0]
+
+        if textdata[1] != render.font_size:
+            render.font_size = textdata[1]
+
+        text_ops.append((render.font_size, int(offset[0]), int(render.font_size + offset[1]), content))
+
+        if '\n' in content:
+            metrics = render.get_font_metrics(layer, content, True)
+        else:
+            metrics = render.get_font_metrics(layer, content, False)
+
+        new_offset = [metrics.text_width, metrics.text_height]
+
+    else:
+        # Fill up the prefixed line first
+        textdata = word_wrap(layer, render, content, size[0] - offset[0], size[1] - offset[1])
+        content_fl = textdata[0]
+
+        if textdata[1] != render.font_size:
+            render.font_size = textdata[1]
+
+        content_fl = content_fl.partition('\n')[0]
+        text_ops.append((render.font_size, int(offset[0]), int(render.font_size + offset[1]), content_fl))
+        metrics = render.get_font_metrics(layer, content_fl, False)
+
+        if len(content) > len(content_fl):
+            # render what's left normally and calculate the height of both text blocks
+            textdata = word_wrap(layer, render, content[len(content_fl):].strip(), size[0],
+                                 size[1] - offset[1])
+            content_rest = textdata[0]
+
+            if textdata[1] != render.font_size:
+                render.font_size = textdata[1]
+
+            text_ops.append((render.font_size, 0, int(2.2 * render.font_size + offset[1]), content_rest))
+
+            if '\n' in content_rest:
+                metrics_rest = render.get_font_metrics(layer, content_rest, False)
+            else:
+                metrics_rest = render.get_font_metrics(layer, content_rest, False)
+
+            new_offset = [0, metrics.text_height + metrics_rest.text_height]
+
+    render.font_size = initial_size
+
+    return text_ops, tuple(offset), tuple(new_offset)
+
+
+def flatten_texts(data: dict, prefix="") -> dict:
+    """
+    Returns all values of a (nested) card definition by their space-separated paths.
+
+    Parameters
+    ----------
+        data : dict
+            The card definition or translation
+        prefix : str
+            The path of the given table (optional)
+
+    Returns
+    -------
+        dict
+            The values by path (e.g. 'modules text paragraph')
+    """
+    texts = dict()
+
+    for key, value in data.items():
+        path = f"{prefix} {key}" if prefix else str(key)
+
+        if isinstance(value, dict):
+            texts.update(flatten_texts(value, path))
+        else:
+            texts[path] = value
+
+    return texts
+
+
 def get_alignment_offset(align: str, module: str) -> int:
     """
     Checks current text alignment and returns the corresponding x-axis offset.
@@ -250,6 +796,13 @@ def get_card_content(language: str, path: str) -> str | dict:
         str | dict
             The translated object or an untranslated object, if no translation was found or no language was given
     """
+    if language not in text_catalog:
+        index_card_texts(language)
+
+    if path in text_catalog[language]:
+        return text_catalog[language][path]
+
+    # tables and missing texts
     fields = path.split()
 
     if len(language) > 0:
@@ -261,14 +814,16 @@ def get_card_content(language: str, path: str) -> str | dict:
         try:
             return str(reduce(operator.getitem, fields, blueprint))
         except KeyError:
-            print(f"  - Missing text string '{path.replace(' ', '.')}'")
+            log_event('warning', f"  - Missing text string '{path.replace(' ', '.')}'", kind='missing_string',
+                      path=path.replace(' ', '.'))
             return ""
 
     else:
         try:
             return reduce(operator.getitem, fields, blueprint)
         except KeyError:
-            print(f"  - Missing text string '{path.replace(' ', '.')}'")
+            log_event('warning', f"  - Missing text string '{path.replace(' ', '.')}'", kind='missing_string',
+                      path=path.replace(' ', '.'))
 
 
 def get_font_style(attribute: str, ctype: str, data: dict, module: str):
@@ -343,16 +898,63 @@ def get_font_style(attribute: str, ctype: str, data: dict, module: str):
         return ""
 
 
-def get_zone_coordinates(zone: list, iteration: int) -> list:
+def get_meta_values(language: str) -> dict:
     """
-    Returns the current zone target coordinates and handles eventual type differences
+    Returns the current card's meta tag values for the given language, resolving them on first use. Meta tags inside
+    meta values are resolved as well (tags referring to themselves are kept unchanged), so templates are filled in a
+    single pass.
 
     Parameters
     ----------
-        zone : list
-            A list of zone coordinates
-        iteration : int
-            Indicates which set of coordinates from the list should be returned (index)
+        language : str
+            The identifier of the desired target language
+
+    Returns
+    -------
+        dict
+            A dictionary containing all meta keys of the card and their (translated, fully resolved) values
+    """
+    if language not in meta_values:
+        raw_values = {key: str(get_card_content(language, " ".join(["meta", key]))) for key in blueprint['meta']}
+        values = dict()
+
+        def resolve(key: str, active: set) -> str:
+            """Resolves the meta tags inside a single meta value; 'active' contains the keys currently resolved."""
+            if key not in values:
+                parts = []
+
+                for token in compile_meta_template(raw_values[key]):
+                    if isinstance(token, str):
+                        parts.append(token)
+                    elif token[1] in raw_values and token[1] not in active:
+                        parts.append(resolve(token[1], active | {token[1]}))
+                    elif token[1] == 'title' and token[1] not in raw_values:
+                        parts.append(str(get_card_content(language, "title")))
+                    else:
+                        parts.append(token[0])
+
+                values[key] = "".join(parts)
+
+            return values[key]
+
+        for key in raw_values:
+            resolve(key, {key})
+
+        meta_values[language] = values
+
+    return meta_values[language]
+
+
+def get_zone_coordinates(zone: list, iteration: int) -> list:
+    """
+    Returns the current zone target coordinates and handles eventual type differences
+
+    Parameters
+    ----------
+        zone : list
+            A list of zone coordinates
+        iteration : int
+            Indicates which set of coordinates from the list should be returned (index)
 
     Returns
     -------
@@ -367,6 +969,666 @@ def get_zone_coordinates(zone: list, iteration: int) -> list:
     return target
 
 
+def index_card_texts(language: str) -> None:
+    """
+    Adds the texts of the current card in the given language to the text catalog. Texts missing in a translation
+    fall back to the card's original texts.
+
+    Parameters
+    ----------
+        language : str
+            The identifier of the language (empty for the untranslated card)
+    """
+    if '' not in text_catalog:
+        text_catalog[''] = flatten_texts(blueprint)
+
+    if len(language) > 0:
+        # untranslated fallbacks are returned as strings, lists are kept for texts consisting of several lines
+        texts = {path: value if isinstance(value, list) else str(value) for path, value in text_catalog[''].items()}
+        texts.update(flatten_texts(translations['translations'].get(language, dict())))
+        text_catalog[language] = texts
+
+
+def iter_bulk_rows(source: str, queries: list):
+    """
+    Streams the raw card records of a bulk card source row by row.
+
+    Supported are CSV files (one card per row), JSON files (a list of cards), JSON lines files (one card per line) and
+    SQLite databases (one card per row of the table 'cards'). Column names are dotted paths of a card's TOML
+    structure like 'card.code' or 'modules.text.cond1.condition'. JSON files are loaded completely, all other sources
+    are read lazily. For SQLite databases the queries with scalar values are evaluated by the database as well, so
+    only rows which may match are read.
+
+    Parameters
+    ----------
+        source : str
+            The path of the bulk card source
+        queries : list
+            A list of (path, value) filters (see query_spec)
+
+    Yields
+    ------
+        dict
+            The record (queries still need to be applied)
+
+    Raises
+    ------
+        ValueError
+            Raised if the file type of the bulk card source is not supported
+    """
+    extension = os.path.splitext(source)[1].lower()
+
+    if extension == '.csv':
+        with open(source, newline='', encoding='utf-8') as file:
+            for row in csv.DictReader(file):
+                yield {key: parse_bulk_value(value) for key, value in row.items() if key}
+
+    elif extension == '.json':
+        with open(source, encoding='utf-8') as file:
+            records = json.load(file)
+
+        if not isinstance(records, list):
+            raise ValueError("a JSON card source must contain a list of cards")
+
+        yield from records
+
+    elif extension == '.jsonl':
+        with open(source, encoding='utf-8') as file:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+
+    elif extension in ['.db', '.sqlite', '.sqlite3']:
+        connection = sqlite3.connect(f"file:{source}?mode=ro", uri=True)
+        connection.row_factory = sqlite3.Row
+
+        try:
+            statement = "SELECT * FROM cards"
+            conditions = []
+            parameters = []
+
+            # cells may be stored as text or as typed values, so both the raw and the converted query value match
+            for path, value in queries:
+                converted = parse_bulk_value(value)
+
+                if isinstance(converted, (str, int, float)):
+                    conditions.append('"' + path.replace('"', '""') + '" IN (?, ?)')
+                    parameters.extend([value, converted])
+
+            if len(conditions) > 0:
+                statement += " WHERE " + " AND ".join(conditions)
+
+            for row in connection.execute(statement, parameters):
+                yield {key: parse_bulk_value(row[key]) for key in row.keys()}
+
+        finally:
+            connection.close()
+
+    else:
+        raise ValueError(f"unsupported file type '{extension}'")
+
+
+def language_spec(string: str) -> set:
+    """
+    Parses the value of the '--languages' command line option.
+
+    Parameters
+    ----------
+        string : str
+            A comma-separated list of language identifiers (e.g. 'de,fr')
+
+    Returns
+    -------
+        set
+            The lower-cased language identifiers
+    """
+    return {language.strip().lower() for language in string.split(',') if language.strip()}
+
+
+def link_output(original: str, filename: str) -> None:
+    """
+    Hard-links (or copies, if links are not supported) an existing output to another filename inside the dist
+    directory.
+
+    Parameters
+    ----------
+        original : str
+            The filename of the existing output
+        filename : str
+            The filename of the new output
+    """
+    if os.path.exists(distpath + filename):
+        os.remove(distpath + filename)
+
+    try:
+        os.link(distpath + original, distpath + filename)
+    except OSError:
+        shutil.copyfile(distpath + original, distpath + filename)
+
+
+def load_card_images() -> tuple:
+    """
+    Returns the decoded template image of the current layout and the current card's image.
+
+    Returns
+    -------
+        tuple
+            The template and the card image as wand.Image objects in the resolution of the template file (shared,
+            must not be modified)
+
+    Raises
+    ------
+        FileNotFoundError
+            Raised if one of the image files does not exist
+    """
+    global asset_scale
+
+    template = load_image(base_dir + settings['paths']['layouts'] + layout['template']['file'])
+
+    if layout['image']['use_vertical']:
+        card_image_file = base_dir + settings['paths']['images'] + blueprint['image']['source_vertical']
+    else:
+        card_image_file = base_dir + settings['paths']['images'] + blueprint['image']['source']
+
+    if render_scale != 1.0:
+        # images are expected in the resolution of the template file; they are kept in this resolution and only
+        # scaled band by band (see crop_rows)
+        asset_scale = layout['template']['size'][0] / template.width
+
+    return template, load_hero(card_image_file)
+
+
+def load_hero(path: str) -> Image:
+    """
+    Returns the card's image prepared for the current layout: resized to the layout's image zone (if the layout
+    defines 'image_zone_dimensions') and cropped to the part visible on the card. Prepared images are kept in the
+    project's cache directory and only prepared again if the image file or the layout changes. In high resolution mode
+    the image is prepared in the resolution of the template file, just like the template itself.
+
+    Parameters
+    ----------
+        path : str
+            The path of the image file
+
+    Returns
+    -------
+        Image
+            The prepared card image (shared, must not be modified)
+
+    Raises
+    ------
+        FileNotFoundError
+            Raised if the image file does not exist
+    """
+    status = os.stat(dir_path(path))
+    zone = [round(value / asset_scale) for value in layout['config']['image_zone']]
+    dimensions = layout['config'].get('image_zone_dimensions')
+    canvas = [round(value / asset_scale) for value in layout['template']['size']]
+
+    if dimensions is not None:
+        dimensions = [max(1, round(value / asset_scale)) for value in dimensions]
+
+    key = json.dumps([os.path.abspath(path), zone, dimensions, canvas])
+    cache_dir = os.path.join(base_dir, '.cache', 'heroes')
+    cache_file = os.path.join(cache_dir, hashlib.sha256(key.encode('utf-8')).hexdigest()[:32] + '.miff')
+
+    # prepared images carry the modification time of their source file
+    if os.path.exists(cache_file) and os.stat(cache_file).st_mtime_ns == status.st_mtime_ns:
+        cache_hits['hero'] += 1
+        return load_image(cache_file)
+
+    with Image(filename=path) as hero:
+        if dimensions is not None:
+            # fill the whole zone, cutting off the overlapping parts evenly
+            factor = max(dimensions[0] / hero.width, dimensions[1] / hero.height)
+            hero.resize(max(1, round(hero.width * factor)), max(1, round(hero.height * factor)))
+            hero.crop(left=(hero.width - dimensions[0]) // 2, top=(hero.height - dimensions[1]) // 2,
+                      width=dimensions[0], height=dimensions[1])
+
+        left = min(max(0, -zone[0]), hero.width - 1)
+        top = min(max(0, -zone[1]), hero.height - 1)
+        hero.crop(left=left, top=top, right=max(left + 1, min(hero.width, canvas[0] - zone[0])),
+                  bottom=max(top + 1, min(hero.height, canvas[1] - zone[1])))
+
+        os.makedirs(cache_dir, exist_ok=True)
+        temp_file = cache_file[:-5] + f"-{os.getpid()}.miff"
+        hero.save(filename=temp_file)
+
+    os.utime(temp_file, ns=(status.st_atime_ns, status.st_mtime_ns))
+    os.replace(temp_file, cache_file)
+
+    return load_image(cache_file)
+
+
+def load_icon(file: str, size: list, mode: int) -> Image:
+    """
+    Returns an icon of the current icon set prepared for the given size (see prepare_image). Prepared icons are
+    shared by all cards of a build.
+
+    Parameters
+    ----------
+        file : str
+            The icon's filename (relative to the icons directory)
+        size : list
+            A list containing the icon's target size [x, y]
+        mode : int
+            The scaling mode (see prepare_image)
+
+    Returns
+    -------
+        Image
+            The prepared icon (shared, must not be modified)
+
+    Raises
+    ------
+        FileNotFoundError
+            Raised if the icon file does not exist
+    """
+    path = base_dir + settings['paths']['icons'] + file
+    key = (path, os.path.getmtime(dir_path(path)), tuple(size), mode, asset_scale)
+
+    if key in icon_cache:
+        cache_hits['icon'] += 1
+        icon_cache.move_to_end(key)
+    else:
+        icon_cache[key] = prepare_image(Image(filename=path), size, mode)
+
+        while len(icon_cache) > icon_cache_size:
+            icon_cache.popitem(last=False)
+
+    return icon_cache[key]
+
+
+def load_image(path: str) -> Image:
+    """
+    Decodes an image file. The most recently used images are kept in memory, so templates and images shared by
+    several cards are only decoded once; changed files are decoded again.
+
+    Parameters
+    ----------
+        path : str
+            The path of the image file
+
+    Returns
+    -------
+        Image
+            The decoded image as wand.Image object (shared, must not be modified)
+
+    Raises
+    ------
+        FileNotFoundError
+            Raised if the given path does not exist
+    """
+    key = (path, os.path.getmtime(dir_path(path)))
+
+    if key in image_cache:
+        cache_hits['image'] += 1
+        image_cache.move_to_end(key)
+    else:
+        image_cache[key] = Image(filename=path)
+
+        while len(image_cache) > image_cache_size:
+            image_cache.popitem(last=False)
+
+    return image_cache[key]
+
+
+def load_output_index() -> None:
+    """Loads the pixel digests of previously built outputs from the dist directory."""
+    output_index.clear()
+
+    try:
+        output_index.update(toml.load(distpath + '.cardmage-index.toml').get('outputs', dict()))
+    except (FileNotFoundError, toml.TomlDecodeError):
+        pass
+
+
+def load_preset(path: str) -> dict:
+    """
+    Loads a font, layout or icon set preset. Each preset file is parsed only once per build; changed files are parsed
+    again.
+
+    Parameters
+    ----------
+        path : str
+            The path of the preset's TOML file
+
+    Returns
+    -------
+        dict
+            The parsed preset
+
+    Raises
+    ------
+        FileNotFoundError
+            Raised if the given path does not exist
+    """
+    mtime = os.path.getmtime(dir_path(path))
+
+    if path in presets and presets[path][0] == mtime:
+        cache_hits['preset'] += 1
+    else:
+        presets[path] = (mtime, toml.load(path))
+
+    return presets[path][1]
+
+
+def log_event(event: str, message, **fields) -> None:
+    """
+    Reports a build event. In text mode only the human-readable message is printed (if any), in JSON lines mode the
+    event is printed as one JSON object containing the event name, the current context and all given fields.
+
+    Parameters
+    ----------
+        event : str
+            The name of the event, e.g. 'card_started' or 'warning'
+        message : str | None
+            The human-readable message (None for events only reported in JSON lines mode)
+        fields
+            Additional machine-readable details of the event
+    """
+    if event == 'warning' and band_warnings is not None:
+        key = json.dumps([message, fields], sort_keys=True, default=str)
+
+        if key in band_warnings:
+            return
+
+        band_warnings.add(key)
+
+    if log_format == 'jsonl':
+        record = {"event": event, **log_context, **fields}
+
+        if message is not None:
+            record['message'] = message.strip(' -\n')
+
+        print(json.dumps(record, ensure_ascii=False, default=str), flush=True)
+    elif message is not None:
+        print(message)
+
+
+def log_stage(stage: str, start: float, **fields) -> None:
+    """
+    Reports the completion of a build stage ('load', 'render' or 'save') together with its duration and the cache
+    hits counted since the last reported stage.
+
+    Parameters
+    ----------
+        stage : str
+            The name of the stage
+        start : float
+            The time.perf_counter() value at the start of the stage
+        fields
+            Additional machine-readable details of the stage
+    """
+    log_event('stage', None, stage=stage, duration_ms=elapsed_ms(start), cache_hits=dict(cache_hits), **fields)
+    cache_hits.clear()
+
+
+def lookup_path(data: dict, path: str):
+    """
+    Returns the entry at a dotted path of a (nested) card definition.
+
+    Parameters
+    ----------
+        data : dict
+            The card definition
+        path : str
+            The dotted path of the requested entry, e.g. 'meta.edition'
+
+    Returns
+    -------
+        The requested entry or None if the path does not exist
+    """
+    try:
+        return reduce(operator.getitem, path.split('.'), data)
+    except (KeyError, IndexError, TypeError):
+        return None
+
+
+def merge_shard_manifests(shard_count: int) -> int:
+    """
+    Verifies that the partial manifests written by all shards of a build cover the deck exactly once and merges
+    them into a single manifest. Only manifests of builds split into the given amount of shards are read, so
+    leftovers of earlier builds with a different shard count are ignored.
+
+    Parameters
+    ----------
+        shard_count : int
+            The amount of shards the build was split into
+
+    Returns
+    -------
+        int
+            The exit code: 0 if the shards cover the deck completely, otherwise 1
+    """
+    manifests = []
+
+    for filename in sorted(os.listdir(distpath)):
+        if re.fullmatch(rf'manifest-\d+-of-{shard_count}\.toml', filename):
+            try:
+                manifests.append(toml.load(distpath + filename)['shard'])
+            except (toml.TomlDecodeError, KeyError):
+                log_event('error', f"  - Manifest '{filename}': Wrong file format.", file=filename)
+                return 1
+
+    if len(manifests) == 0:
+        log_event('error', f"No manifests of {shard_count} shards found inside the dist directory; therefore nothing "
+                           "to do.")
+        return 1
+
+    deck = manifests[0]['deck']
+    errors = []
+    covered = dict()
+
+    for manifest in manifests:
+        if manifest['count'] != shard_count or manifest['deck'] != deck:
+            errors.append(f"Shard {manifest['index']}/{manifest['count']} was built from a different deck or "
+                          "shard count")
+            continue
+
+        for card in manifest['cards']:
+            covered.setdefault(card, []).append(manifest['index'])
+
+    indices = sorted(manifest['index'] for manifest in manifests)
+
+    if indices != list(range(1, shard_count + 1)):
+        errors.append(f"Expected shards 1 to {shard_count}, found {', '.join(str(index) for index in indices)}")
+
+    for card in deck:
+        if card not in covered:
+            errors.append(f"Card '{card}' is not covered by any shard")
+        elif len(covered[card]) > 1:
+            errors.append(f"Card '{card}' is covered by shards {', '.join(str(i) for i in covered[card])}")
+
+    for card in covered:
+        if card not in deck:
+            errors.append(f"Card '{card}' does not belong to the deck")
+
+    for error in errors:
+        log_event('error', f"  - {error}")
+
+    if len(errors) > 0:
+        log_event('merge_failed', f"Merge of {len(manifests)} shard manifests failed.", manifests=len(manifests),
+                  errors=len(errors))
+        return 1
+
+    merged = dict(deck=dict(cards=deck, shards=shard_count,
+                            failed=sorted(card for manifest in manifests for card in manifest['failed'])),
+                  outputs=dict(), duplicates=dict())
+
+    for manifest in manifests:
+        merged['outputs'].update(manifest['outputs'])
+        merged['duplicates'].update(manifest.get('duplicates', dict()))
+
+    with open(distpath + 'manifest.toml', 'w', encoding='utf-8') as file:
+        toml.dump(merged, file)
+
+    log_event('merge_completed', f"Merged {len(manifests)} shard manifests: all {len(deck)} cards covered exactly "
+                                 "once.", manifests=len(manifests), cards=len(deck), failed=merged['deck']['failed'])
+
+    if len(merged['deck']['failed']) > 0:
+        log_event('warning', f"  - Failed builds: {', '.join(merged['deck']['failed'])}", kind='failed_builds')
+
+    return 0
+
+
+def module_visible(data: dict, module: str, canvas_height: int) -> bool:
+    """
+    Checks if a module's rendering zones intersect the current canvas. Only relevant in high resolution mode, where
+    each band of a card is rendered on its own canvas (see render_card_bands).
+
+    Parameters
+    ----------
+        data : dict
+            The card data of the module
+        module : str
+            The name of the module
+        canvas_height : int
+            The height of the current canvas
+
+    Returns
+    -------
+        bool
+            False if the module can't affect any pixel of the canvas
+    """
+    zones = layout['modules'][module + '_zone']
+
+    if isinstance(zones[0], (int, float)):
+        zones = [zones]
+
+    top = min(zone[1] for zone in zones)
+    bottom = max(zone[1] for zone in zones) + layout['modules'].get(module + '_zone_dimensions', [0, canvas_height])[1]
+
+    if module + '_zone_icon_offset' in layout['modules']:
+        top += min(0, layout['modules'][module + '_zone_icon_offset'][1])
+        bottom += max(0, layout['modules'][module + '_zone_icon_offset'][1])
+
+    if 'image' in data or any(isinstance(value, dict) and 'image' in value for value in data.values()):
+        # images aren't limited to their zone's dimensions
+        bottom = canvas_height
+
+    return top < canvas_height and bottom > 0
+
+
+def parse_bulk_value(value):
+    """
+    Converts a text cell of a CSV or SQLite card source into the matching TOML value. Cells containing TOML arrays,
+    inline tables, booleans or numbers (without leading zeros) are parsed, every other cell is kept as a string.
+
+    Parameters
+    ----------
+        value
+            The raw cell value
+
+    Returns
+    -------
+        The converted value (None for empty cells)
+    """
+    if not isinstance(value, str):
+        return value
+
+    value = value.strip()
+
+    if value == '':
+        return None
+
+    if value[0] in '[{' or value in ['true', 'false'] or re.fullmatch(r'-?(0|[1-9]\d*)(\.\d+)?', value):
+        try:
+            return toml.loads("value = " + value)['value']
+        except toml.TomlDecodeError:
+            pass
+
+    return value
+
+
+def partition_cards(cards: list, costs: dict, shard: int, shard_count: int) -> list:
+    """
+    Splits the deck into cost-balanced parts and returns the cards assigned to the given shard. The result only
+    depends on the list of cards and their contents, so every node of a distributed build computes the same split.
+
+    Parameters
+    ----------
+        cards : list
+            The names of all cards of the deck
+        costs : dict
+            The estimated build cost of each card (see estimate_build_cost)
+        shard : int
+            The number of the requested shard (1 to shard_count)
+        shard_count : int
+            The total amount of shards
+
+    Returns
+    -------
+        list
+            The names of the cards assigned to the requested shard (in deck order)
+    """
+    loads = [0.0] * shard_count
+    assigned = dict()
+
+    # the most expensive cards are distributed first, each one to the least loaded shard
+    for card in sorted(cards, key=lambda name: (-costs[name], name)):
+        target = min(range(shard_count), key=lambda index: (loads[index], index))
+        loads[target] += costs[card]
+        assigned[card] = target + 1
+
+    return [card for card in cards if assigned[card] == shard]
+
+
+def positive_float(string: str) -> float:
+    """
+    Parses a command line option value that has to be a number greater than 0.
+
+    Parameters
+    ----------
+        string : str
+            The option's value
+
+    Returns
+    -------
+        float
+            The parsed number
+
+    Raises
+    ------
+        argparse.ArgumentTypeError
+            Raised if the value is not a number greater than 0
+    """
+    try:
+        value = float(string)
+    except ValueError:
+        value = 0.0
+
+    if not value > 0 or math.isinf(value):
+        raise argparse.ArgumentTypeError(f"invalid value '{string}' (expected a number greater than 0)")
+
+    return value
+
+
+def positive_int(string: str) -> int:
+    """
+    Parses a command line option value that has to be a whole number greater than 0.
+
+    Parameters
+    ----------
+        string : str
+            The option's value
+
+    Returns
+    -------
+        int
+            The parsed number
+
+    Raises
+    ------
+        argparse.ArgumentTypeError
+            Raised if the value is not a whole number greater than 0
+    """
+    if not string.strip().isdigit() or int(string) < 1:
+        raise argparse.ArgumentTypeError(f"invalid value '{string}' (expected a whole number greater than 0)")
+
+    return int(string)
+
+
 def prepare_image(icon: Image, size: list, mode: int) -> Image:
     """
     Returns an icon as Image object and scales it, if necessary
@@ -381,27 +1643,316 @@ def prepare_image(icon: Image, size: list, mode: int) -> Image:
             Defines if the icon shouldn't be scaled at all (0), only scaled down if it's too big (1)
             or scaled in both directions to match the target size as close as possible (2)
 
-    Returns
-    -------
-        Image
-            The processed wand.Image object
+    Returns
+    -------
+        Image
+            The processed wand.Image object
+    """
+    if asset_scale != 1.0:
+        icon.resize(max(1, int(icon.width * asset_scale)), max(1, int(icon.height * asset_scale)))
+
+    if mode > 0:
+        scale_x = size[0] / icon.width
+        scale_y = size[1] / icon.height
+
+        if mode == 1:
+            if scale_x <= scale_y and scale_x <= 1:
+                icon.resize(int(icon.width * scale_x), int(icon.height * scale_x))
+            elif scale_x > scale_y and scale_y <= 1:
+                icon.resize(int(icon.width * scale_y), int(icon.height * scale_y))
+        else:
+            if scale_x <= scale_y:
+                icon.resize(int(icon.width * scale_x), int(icon.height * scale_x))
+            else:
+                icon.resize(int(icon.width * scale_y), int(icon.height * scale_y))
+
+    return icon
+
+
+def query_spec(string: str) -> tuple:
+    """
+    Parses the value of the '--query' command line option.
+
+    Parameters
+    ----------
+        string : str
+            The query in the format 'PATH=VALUE'
+
+    Returns
+    -------
+        tuple
+            The dotted path and the expected value
+
+    Raises
+    ------
+        ValueError
+            Raised if the query is malformed
+    """
+    path, separator, value = string.partition('=')
+
+    if not separator or not path.strip():
+        raise ValueError(f"invalid query '{string}' (expected PATH=VALUE)")
+
+    return path.strip(), value.strip()
+
+
+def read_bulk_cards(source: str, queries: list):
+    """
+    Streams the cards of a bulk card source as card definitions with the same structure as a card's root TOML file.
+    Translations can be included in the same record as 'translations.<language>.<path>' entries.
+
+    Parameters
+    ----------
+        source : str
+            The path of the bulk card source
+        queries : list
+            A list of (path, value) filters (see query_spec)
+
+    Yields
+    ------
+        tuple
+            The card's name, its definition and its translations (None if the record contains no translations)
+    """
+    row_no = 0
+
+    for record in iter_bulk_rows(source, queries):
+        row_no += 1
+        card_data = dict()
+
+        for key, value in record.items():
+            if value is None:
+                continue
+
+            fields = key.split('.')
+            node = card_data
+
+            for field in fields[:-1]:
+                node = node.setdefault(field, dict())
+
+            node[fields[-1]] = value
+
+        # query values are converted like cells, so 'true', '7' or '[7, 3]' match the parsed entries (and plain JSON
+        # strings still match their literal text)
+        if not all(lookup_path(card_data, path) in [parse_bulk_value(value), value] for path, value in queries):
+            continue
+
+        card_translations = card_data.pop('translations', None)
+
+        if 'name' in card_data:
+            card = str(card_data.pop('name'))
+        elif 'code' in card_data.get('card', dict()):
+            # card codes are resolved without translations, like the code shown in the build progress
+            values = {key: str(value) for key, value in card_data.get('meta', dict()).items()}
+            values.setdefault('title', str(card_data.get('title', '')))
+            card = "".join(token if isinstance(token, str) else values.get(token[1], token[0])
+                           for token in compile_meta_template(card_data['card']['code']))
+        else:
+            card = f"#{row_no}"
+
+        yield card, card_data, card_translations
+
+
+def register_output(digest: str, filename: str) -> None:
+    """
+    Adds a newly written output to the index of pixel digests.
+
+    Parameters
+    ----------
+        digest : str
+            The pixel digest of the output
+        filename : str
+            The output's filename (relative to the dist directory)
+    """
+    status = os.stat(distpath + filename)
+    output_index[digest] = dict(file=filename, size=status.st_size, mtime=status.st_mtime_ns)
+
+
+def render_blueprint(card_data: dict, card_translations: dict, language: str, image_format: str,
+                     print_mode: bool) -> bytes:
+    """
+    Renders a single card definition and returns the encoded image. Used by the render server (see cardmage.server);
+    presets and decoded images stay cached between calls.
+
+    Parameters
+    ----------
+        card_data : dict
+            The card definition (same structure as a card's root TOML file)
+        card_translations : dict
+            The card's translations (same structure as the 'translations' section of a translation file)
+        language : str
+            Defines a target language for the cards texts (optional)
+        image_format : str
+            The output file format ('png', 'tif' or 'qoi')
+        print_mode : bool
+            Optimizes the image for print (CMYK + TIF format)
+
+    Returns
+    -------
+        bytes
+            The encoded image
+
+    Raises
+    ------
+        FileNotFoundError
+            Raised if a preset or image file required by the card does not exist
+        KeyError
+            Raised if the card definition is incomplete or the requested translation does not exist
+    """
+    global blueprint
+    global font
+    global icons
+    global layout
+    global translations
+
+    blueprint = card_data
+    translations = dict(translations=card_translations or dict())
+    meta_values.clear()
+    text_catalog.clear()
+
+    # workers live as long as the render server, so the oldest texts are dropped from the build-wide caches
+    for cache in [text_layout_cache, meta_templates]:
+        while len(cache) > worker_cache_size:
+            del cache[next(iter(cache))]
+
+    if len(language) > 0 and language not in translations['translations']:
+        raise KeyError(f"no translation for language '{language}'")
+
+    font = load_preset(base_dir + settings['paths']['fonts'] + blueprint['card']['font'] + ".toml")
+    layout = load_preset(base_dir + settings['paths']['layouts'] + blueprint['layout']['type'] + ".toml")
+    icons = load_preset(base_dir + settings['paths']['icons'] + layout['icons']['set'] + ".toml")
+
+    template, card_image = load_card_images()
+    current = render_card(template, card_image, language)
+
+    if print_mode:
+        image_format = "tif"
+        current.transform_colorspace('cmyk')
+
+    with current:
+        return current.make_blob(image_format)
+
+
+def render_card(template: Image, card_image: Image, language: str) -> Image:
+    """
+    Renders the current card in the given language.
+
+    Parameters
+    ----------
+        template : Image
+            The layout's template image (is not modified; None if not visible)
+        card_image : Image
+            The card's image prepared by load_hero (is not modified; None if not visible)
+        language : str
+            Defines a target language for the cards texts (empty for the untranslated card)
+
+    Returns
+    -------
+        Image
+            The rendered card
+    """
+    with Color(layout['template']['background']) as bg:
+        current = Image(width=layout['template']['size'][0], height=layout['template']['size'][1],
+                        background=bg)
+
+    with Drawing() as draw:
+        if card_image is not None:
+            # card images are cropped to their visible part (see load_hero)
+            draw.composite(operator='atop', left=max(0, layout['config']['image_zone'][0]),
+                           top=max(0, layout['config']['image_zone'][1]), width=card_image.width,
+                           height=card_image.height, image=card_image)
+
+        if template is not None:
+            draw.composite(operator='atop', left=0, top=0, width=template.width, height=template.height,
+                           image=template)
+
+        # 4. Use wand to place text onto card
+        draw.font = get_font_style('fontstyle', 'title', dict(), '_null_')
+        draw.font_size = get_font_style('fontsize', 'title', dict(), '_null_') * render_scale
+        draw.fill_color = get_font_style('fontcolor', 'title', dict(), '_null_')
+        draw.text_alignment = get_font_style('textalign', 'title', dict(), '_null_')
+
+        if 'outline' in font['tags']['title']:
+            draw.stroke_color = Color(font['tags']['title']['outline']['color'])
+            draw.stroke_width = font['tags']['title']['outline']['width'] * render_scale
+
+        offset_x = get_alignment_offset(draw.text_alignment, 'title')
+        draw.text(layout['config']['title_zone'][0] + offset_x, layout['config']['title_zone'][1],
+                  get_card_content(language, "title"))
+        draw(current)
+
+        for module in blueprint['modules']:
+            if module + '_zone' in layout['modules']:
+                if module_visible(blueprint['modules'][module], module, current.height):
+                    render_card_content(blueprint['modules'][module], module, draw, language=language)
+
+            else:
+                log_event('warning', f"  - NOTICE: Module '{module}' found, but the current layout specifies no"
+                                     " rendering zone for this module; skipping", kind='missing_zone', module=module)
+            continue
+
+        draw(current)
+
+    return current
+
+
+def render_card_bands(template: Image, card_image: Image, language: str, band_height: int, cmyk: bool):
+    """
+    Renders the current card in horizontal bands (high resolution mode). Each band is rendered on its own canvas
+    using a shifted copy of the layout; assets and modules not intersecting a band are skipped, and the layers of the
+    modules only cover the rows inside the band. Text layouts are fitted once per card and language (see
+    render_text_multiline) and warnings are reported only once.
+
+    Parameters
+    ----------
+        template : Image
+            The layout's template image in the resolution of its file (is not modified)
+        card_image : Image
+            The card's image in the resolution of the template file (is not modified)
+        language : str
+            Defines a target language for the cards texts (empty for the untranslated card)
+        band_height : int
+            The maximum height of a band in pixels
+        cmyk : bool
+            Converts the bands to CMYK
+
+    Yields
+    ------
+        bytes
+            The band's raw pixel rows (8 bit RGBA or CMYK)
     """
-    if mode > 0:
-        scale_x = size[0] / icon.width
-        scale_y = size[1] / icon.height
+    global band_warnings
+    global layout
 
-        if mode == 1:
-            if scale_x <= scale_y and scale_x <= 1:
-                icon.resize(int(icon.width * scale_x), int(icon.height * scale_x))
-            elif scale_x > scale_y and scale_y <= 1:
-                icon.resize(int(icon.width * scale_y), int(icon.height * scale_y))
-        else:
-            if scale_x <= scale_y:
-                icon.resize(int(icon.width * scale_x), int(icon.height * scale_x))
-            else:
-                icon.resize(int(icon.width * scale_y), int(icon.height * scale_y))
+    card_layout = layout
+    band_warnings = set()
+    width, height = card_layout['template']['size']
+    image_zone = [max(0, offset) for offset in card_layout['config']['image_zone']]
 
-    return icon
+    try:
+        for top in range(0, height, max(1, band_height)):
+            rows = min(band_height, height - top)
+            layout = shift_layout(card_layout, top, rows)
+            template_band = crop_rows(template, top, rows, asset_scale)
+            image_band = crop_rows(card_image, max(0, top - image_zone[1]), rows + min(0, top - image_zone[1]),
+                                   asset_scale)
+            layout['config']['image_zone'] = [image_zone[0], max(0, image_zone[1] - top)]
+
+            with render_card(template_band, image_band, language) as band:
+                if cmyk:
+                    band.transform_colorspace('cmyk')
+
+                band.depth = 8
+                pixels = band.make_blob('CMYK' if cmyk else 'RGBA')
+
+            for image in [template_band, image_band]:
+                if image is not None:
+                    image.close()
+
+            yield pixels
+
+    finally:
+        band_warnings = None
+        layout = card_layout
 
 
 def render_card_content(data: dict, module: str, draw: Drawing, language="") -> None:
@@ -420,11 +1971,9 @@ def render_card_content(data: dict, module: str, draw: Drawing, language="") ->
             Defines a target language for the cards texts (optional)
     """
     target_coordinates = layout['modules'][module + '_zone']
-
-    with Color('transparent') as bg:
-        content_layer = Image(width=layout['modules'][module + '_zone_dimensions'][0],
-                              height=layout['modules'][module + '_zone_dimensions'][1], background=bg)
-        offset = [0, 0]
+    zone_size = layout['modules'][module + '_zone_dimensions']
+    content_layer, first_row = zone_layer(module, get_zone_coordinates(target_coordinates, 0)[1])
+    offset = [0, 0]
 
     with Drawing() as render:
         default_prio = ['image', 'prefix', 'condition', 'paragraph', 'list', 'icons', 'array']
@@ -439,7 +1988,8 @@ def render_card_content(data: dict, module: str, draw: Drawing, language="") ->
                 try:
                     ctype = data[element]['type']
                 except KeyError:
-                    print(f"  - Missing type declaration for content element '{element}’. Skipping...")
+                    log_event('warning', f"  - Missing type declaration for content element '{element}’. Skipping...",
+                              kind='missing_type', module=module, element=element)
                     continue
                 else:
                     el_data = data[element]
@@ -453,12 +2003,12 @@ def render_card_content(data: dict, module: str, draw: Drawing, language="") ->
             if ctype in el_data:
                 outline = get_font_style('outline', ctype, el_data, module)
                 render.font = get_font_style('fontstyle', ctype, el_data, module)
-                render.font_size = get_font_style('fontsize', ctype, el_data, module)
+                render.font_size = get_font_style('fontsize', ctype, el_data, module) * render_scale
                 render.fill_color = get_font_style('fontcolor', ctype, el_data, module)
                 render.text_alignment = get_font_style('textalign', ctype, el_data, module)
                 render.text_decoration = get_font_style('textdecoration', ctype, el_data, module)
                 render.stroke_color = Color(outline['color'])
-                render.stroke_width = outline['width']
+                render.stroke_width = outline['width'] * render_scale
 
                 space_offset = render.get_font_metrics(content_layer, ' ', True)
 
@@ -473,11 +2023,7 @@ def render_card_content(data: dict, module: str, draw: Drawing, language="") ->
 
                     if isinstance(target_coordinates[0], int) or len(target_coordinates) == 1:
                         targets = get_zone_coordinates(target_coordinates, iteration)
-
-                        with Color('transparent') as bg:
-                            content_layer = Image(width=layout['modules'][module + '_zone_dimensions'][0],
-                                                  height=layout['modules'][module + '_zone_dimensions'][1],
-                                                  background=bg)
+                        content_layer, first_row = zone_layer(module, targets[1])
 
                         with Drawing(render) as gfx:
                             text = ""
@@ -497,25 +2043,30 @@ def render_card_content(data: dict, module: str, draw: Drawing, language="") ->
                                         text += str(number)
 
                                         try:
-                                            icon_file = Image(
-                                                filename=dir_path(base_dir + settings['paths']['icons'] +
-                                                                  icons['icons'][el_data['keys'][iteration]]))
+                                            icon_layer = load_icon(icons['icons'][el_data['keys'][iteration]],
+                                                                   [layout['modules'][module + '_zone_dimensions'][0],
+                                                                    int(1.2 * gfx.font_size)], 1)
                                         except FileNotFoundError:
-                                            print(f"  - NOTICE: Required icon file {settings['paths']['icons']}"
-                                                  f"{icons['icons'][el_data['keys'][iteration]]} not found. Skipping...")
+                                            log_event('warning', "  - NOTICE: Required icon file "
+                                                                 f"{settings['paths']['icons']}"
+                                                                 f"{icons['icons'][el_data['keys'][iteration]]}"
+                                                                 " not found. Skipping...",
+                                                      kind='missing_icon_file', module=module,
+                                                      icon=el_data['keys'][iteration])
                                             continue
                                         except IndexError:
-                                            print(f"  - NOTICE: No icon found for array '{element}', entry #"
-                                                  f"{str(iteration + 1)}. Skipping...")
+                                            log_event('warning', "  - NOTICE: No icon found for array "
+                                                                 f"'{element}', entry #{str(iteration + 1)}."
+                                                                 " Skipping...", kind='missing_icon', module=module,
+                                                      entry=iteration + 1)
                                             break
                                         except KeyError:
-                                            print(f"  - NOTICE: Requested icon '{el_data['keys'][iteration]}'"
-                                                  " is not defined. Skipping...")
+                                            log_event('warning', "  - NOTICE: Requested icon "
+                                                                 f"'{el_data['keys'][iteration]}' is not defined."
+                                                                 " Skipping...", kind='undefined_icon', module=module,
+                                                      icon=el_data['keys'][iteration])
                                             continue
                                         else:
-                                            icon_layer = prepare_image(
-                                                icon_file.clone(), [layout['modules'][module + '_zone_dimensions'][0],
-                                                                    int(1.2 * gfx.font_size)], 1)
                                             text_offset = gfx.get_font_metrics(content_layer, text, True)
                                             draw.composite(operator='atop',
                                                            left=targets[0] + text_offset.text_width + 4,
@@ -525,8 +2076,9 @@ def render_card_content(data: dict, module: str, draw: Drawing, language="") ->
 
                                             text += int((icon_layer.width + 10) / space_offset.text_width) * ' '
                                     else:
-                                        print("  - NOTICE: No 'keys_as' or 'keys' attribute found; "
-                                              "using default 'keys_as = none'")
+                                        log_event('warning', "  - NOTICE: No 'keys_as' or 'keys' attribute found; "
+                                                             "using default 'keys_as = none'", kind='missing_keys',
+                                                  module=module)
                                         text += str(number)
 
                                     rendered += 1
@@ -536,75 +2088,76 @@ def render_card_content(data: dict, module: str, draw: Drawing, language="") ->
                             offset[0] = get_alignment_offset(render.text_alignment, module)
 
                             if keys_mode == 'icons':
-                                render_text_multiline(text, content_layer, offset, gfx, mod=1.5)
+                                render_text_multiline(text, content_layer, offset, gfx, mod=1.5, size=zone_size,
+                                                      first_row=first_row)
                             else:
-                                render_text_multiline(text, content_layer, offset, gfx)
+                                render_text_multiline(text, content_layer, offset, gfx, size=zone_size,
+                                                      first_row=first_row)
 
                             gfx.draw(content_layer)
 
-                        draw.composite(operator='atop', left=targets[0], top=targets[1], width=content_layer.width,
-                                       height=content_layer.height, image=content_layer)
+                        draw.composite(operator='atop', left=targets[0], top=targets[1] + first_row,
+                                       width=content_layer.width, height=content_layer.height, image=content_layer)
 
                     else:
+                        # one zone per entry: number tiles and icons are taken from the caches and composited
+                        # straight onto the card
                         offset[0] += get_alignment_offset(render.text_alignment, module)
 
                         for number in el_data[ctype]:
                             targets = get_zone_coordinates(target_coordinates, rendered)
 
                             if number > 0:
-                                with Color('transparent') as bg:
-                                    content_layer = Image(width=layout['modules'][module + '_zone_dimensions'][0],
-                                                          height=layout['modules'][module + '_zone_dimensions'][1],
-                                                          background=bg)
-
-                                with Drawing(render) as gfx:
-                                    text = ""
-
-                                    if keys_mode == 'text':
-                                        text += str(number) + " " + get_card_content(
-                                            language, " ".join(["modules", module, "keys"]))[iteration]
-                                    elif keys_mode == 'icons':
-                                        text += str(number)
-
-                                        try:
-                                            icon_file = Image(
-                                                filename=dir_path(base_dir + settings['paths']['icons'] +
-                                                                  icons['icons'][el_data['keys'][iteration]]))
-                                        except FileNotFoundError:
-                                            print(f"  - NOTICE: Required icon file {settings['paths']['icons']}"
-                                                  f"{icons['icons'][el_data['keys'][iteration]]} not found. Skipping...")
-                                            continue
-                                        except IndexError:
-                                            print(f"  - NOTICE: No icon found for array '{element}', entry #"
-                                                  f"{str(iteration + 1)}. Skipping...")
-                                            break
-                                        except KeyError:
-                                            print(f"  - NOTICE: Requested icon '{el_data['keys'][iteration]}'"
-                                                  " is not defined. Skipping...")
-                                            continue
-                                        else:
-                                            icon_layer = prepare_image(
-                                                icon_file.clone(), layout['modules'][module + '_zone_dimensions'], 0)
-                                            draw.composite(operator='atop',
-                                                           left=targets[0] + layout['modules'][module + '_zone_icon_offset'][0],
-                                                           top=targets[1] + layout['modules'][module + '_zone_icon_offset'][1],
-                                                           width=icon_layer.width, height=icon_layer.height,
-                                                           image=icon_layer)
+                                text = ""
+
+                                if keys_mode == 'text':
+                                    text += str(number) + " " + get_card_content(
+                                        language, " ".join(["modules", module, "keys"]))[iteration]
+                                elif keys_mode == 'icons':
+                                    text += str(number)
+
+                                    try:
+                                        icon_layer = load_icon(icons['icons'][el_data['keys'][iteration]],
+                                                               layout['modules'][module + '_zone_dimensions'], 0)
+                                    except FileNotFoundError:
+                                        log_event('warning', "  - NOTICE: Required icon file "
+                                                             f"{settings['paths']['icons']}"
+                                                             f"{icons['icons'][el_data['keys'][iteration]]}"
+                                                             " not found. Skipping...",
+                                                  kind='missing_icon_file', module=module,
+                                                  icon=el_data['keys'][iteration])
+                                        continue
+                                    except IndexError:
+                                        log_event('warning', "  - NOTICE: No icon found for array "
+                                                             f"'{element}', entry #{str(iteration + 1)}."
+                                                             " Skipping...", kind='missing_icon', module=module,
+                                                  entry=iteration + 1)
+                                        break
+                                    except KeyError:
+                                        log_event('warning', "  - NOTICE: Requested icon "
+                                                             f"'{el_data['keys'][iteration]}' is not defined."
+                                                             " Skipping...", kind='undefined_icon', module=module,
+                                                  icon=el_data['keys'][iteration])
+                                        continue
                                     else:
-                                        print("  - NOTICE: No 'keys_as' or 'keys' attribute found; "
-                                              "using default 'keys_as = none'")
-                                        text += str(number)
-
-                                    gfx.text(int(offset[0]), int(render.font_size + offset[1]), text)
-                                    gfx.draw(content_layer)
-
-                                if rendered < len(target_coordinates) - 1:
-                                    rendered += 1
+                                        icon_offset = layout['modules'][module + '_zone_icon_offset']
+                                        draw.composite(operator='atop', left=targets[0] + icon_offset[0],
+                                                       top=targets[1] + icon_offset[1], width=icon_layer.width,
+                                                       height=icon_layer.height, image=icon_layer)
+                                else:
+                                    log_event('warning', "  - NOTICE: No 'keys_as' or 'keys' attribute found; "
+                                                         "using default 'keys_as = none'", kind='missing_keys',
+                                              module=module)
+                                    text += str(number)
 
+                                content_layer = render_text_tile(text, render, offset, module)
                                 draw.composite(operator='atop', left=targets[0], top=targets[1],
                                                width=content_layer.width, height=content_layer.height,
                                                image=content_layer)
 
+                                if rendered < len(target_coordinates) - 1:
+                                    rendered += 1
+
                             iteration += 1
 
                 elif ctype == 'icons':
@@ -619,8 +2172,9 @@ def render_card_content(data: dict, module: str, draw: Drawing, language="") ->
                                 icon_file = Image(
                                     filename=dir_path(base_dir + settings['paths']['icons'] + icons['icons'][icon]))
                             except FileNotFoundError:
-                                print(f"  - NOTICE: Required icon file {settings['paths']['icons']}"
-                                      f"{icons['icons'][icon]} not found. Skipping...")
+                                log_event('warning', f"  - NOTICE: Required icon file {settings['paths']['icons']}"
+                                                     f"{icons['icons'][icon]} not found. Skipping...",
+                                          kind='missing_icon_file', module=module, icon=icon)
                                 continue
                             else:
                                 icon_layer = prepare_image(
@@ -647,8 +2201,9 @@ def render_card_content(data: dict, module: str, draw: Drawing, language="") ->
                                     icon_file = Image(
                                         filename=dir_path(base_dir + settings['paths']['icons'] + icons['icons'][icon]))
                                 except FileNotFoundError:
-                                    print(f"  - NOTICE: Required icon file {settings['paths']['icons']}"
-                                          f"{icons['icons'][icon]} not found. Skipping...")
+                                    log_event('warning', f"  - NOTICE: Required icon file {settings['paths']['icons']}"
+                                                         f"{icons['icons'][icon]} not found. Skipping...",
+                                              kind='missing_icon_file', module=module, icon=icon)
                                     iteration += 1
                                     continue
                                 else:
@@ -662,12 +2217,13 @@ def render_card_content(data: dict, module: str, draw: Drawing, language="") ->
                 elif ctype == 'list':
                     for line in get_card_content(language, path):
                         content = resolve_meta_tags(line, language=language)
-                        textdata = word_wrap(content_layer, render, content,
-                                             content_layer.width - int(1 * render.font_size),
-                                             content_layer.height - offset[1])
+                        textdata = word_wrap(content_layer, render, content, zone_size[0] - int(1 * render.font_size),
+                                             zone_size[1] - offset[1])
                         content = textdata[0]
 
                         if textdata[1] != render.font_size:
+                            log_event('warning', None, kind='font_shrunk', module=module, requested=render.font_size,
+                                      fitted=textdata[1])
                             render.font_size = textdata[1]
 
                         if get_font_style('bullet', ctype, el_data, module) == "dot":
@@ -676,8 +2232,9 @@ def render_card_content(data: dict, module: str, draw: Drawing, language="") ->
                             bullet = '–'
 
                         metrics = render.get_font_metrics(content_layer, content, True)
-                        render.text(int(offset[0]), int(render.font_size + offset[1]), bullet)
-                        render.text(int(1 * render.font_size + offset[0]), int(render.font_size + offset[1]), content)
+                        baseline = int(render.font_size + offset[1]) - first_row
+                        render.text(int(offset[0]), baseline, bullet)
+                        render.text(int(1 * render.font_size + offset[0]), baseline, content)
                         offset[1] += metrics.text_height + int(render.font_size * 0.25)
 
                     render.draw(content_layer)
@@ -686,10 +2243,15 @@ def render_card_content(data: dict, module: str, draw: Drawing, language="") ->
                     try:
                         image = Image(filename=dir_path(base_dir + settings['paths']['images'] + el_data[ctype]))
                     except FileNotFoundError:
-                        print(f"  - NOTICE: Required image file {settings['paths']['images']}{el_data[ctype]}"
-                              " not found. Skipping...")
+                        log_event('warning', f"  - NOTICE: Required image file {settings['paths']['images']}"
+                                             f"{el_data[ctype]} not found. Skipping...", kind='missing_image',
+                                  module=module, image=el_data[ctype])
                         continue
                     else:
+                        if asset_scale != 1.0:
+                            image.resize(max(1, int(image.width * asset_scale)),
+                                         max(1, int(image.height * asset_scale)))
+
                         temp_offset = get_alignment_offset(render.text_alignment, module)
 
                         if render.text_alignment == 'center':
@@ -701,14 +2263,13 @@ def render_card_content(data: dict, module: str, draw: Drawing, language="") ->
                                        top=target_coordinates[1], width=image.width, height=image.height, image=image)
 
                 else:
-                    with Color('transparent') as bg:
-                        text_layer = Image(width=layout['modules'][module + '_zone_dimensions'][0],
-                                           height=layout['modules'][module + '_zone_dimensions'][1], background=bg)
+                    text_layer = zone_layer(module, target_coordinates[1])[0]
 
                     with Drawing(render) as gfx:
                         offset[0] += get_alignment_offset(render.text_alignment, module)
                         content = resolve_meta_tags(get_card_content(language, path), language=language)
-                        new_offset = render_text_multiline(content, text_layer, offset, gfx)
+                        new_offset = render_text_multiline(content, text_layer, offset, gfx, size=zone_size,
+                                                           first_row=first_row)
 
                         if ctype == 'prefix':
                             offset[0] += new_offset[0] + int(render.font_size * 0.25)
@@ -717,18 +2278,20 @@ def render_card_content(data: dict, module: str, draw: Drawing, language="") ->
                             offset[1] += new_offset[1] + int(render.font_size * 0.25)
 
                         gfx.draw(text_layer)
-                        draw.composite(operator='atop', left=target_coordinates[0], top=target_coordinates[1],
-                                       width=text_layer.width, height=text_layer.height, image=text_layer)
+                        draw.composite(operator='atop', left=target_coordinates[0],
+                                       top=target_coordinates[1] + first_row, width=text_layer.width,
+                                       height=text_layer.height, image=text_layer)
 
                 if ctype not in ['array', 'icons', 'image']:
-                    draw.composite(operator='atop', left=target_coordinates[0], top=target_coordinates[1],
+                    draw.composite(operator='atop', left=target_coordinates[0], top=target_coordinates[1] + first_row,
                                    width=content_layer.width, height=content_layer.height, image=content_layer)
 
             else:
                 continue
 
 
-def render_text_multiline(content: str, layer: Image, offset: list, render: Drawing, mod=1.0) -> list:
+def render_text_multiline(content: str, layer: Image, offset: list, render: Drawing, mod=1.0, size=None,
+                          first_row=0) -> list:
     """
     Renders text depending on available space and current horizontal offsets.
 
@@ -745,70 +2308,84 @@ def render_text_multiline(content: str, layer: Image, offset: list, render: Draw
         mod : float
             Optional modifier used for increasing the 'Mode 2' threshold if the 'content' is likely to contain a
             lot of spaces
+        size : list
+            The size [x, y] of the module's zone the text is fitted into (optional, defaults to the layer's size)
+        first_row : int
+            The zone's row the layer starts with, if the layer only covers a part of the zone (see zone_layer)
 
     Returns
     -------
         list
             A list containing the new offset values resulting from the text rendering
     """
-    new_offset = [0, 0]
+    size = size or [layer.width, layer.height]
+    layout_key = ('multiline', content, render.font, render.font_size, render.stroke_width, render.text_alignment,
+                  size[0], size[1], offset[0], offset[1], mod)
 
-    # estimated amount of possible characters that can be rendered in the current rendering zone
-    chars_line = int(layer.width / (0.75 * render.font_size)) * mod
-    lines_max = int((layer.height - offset[1]) / (1.2 * render.font_size))
-    chars_max = (lines_max - 1) * chars_line
-
-    if offset[0] == 0 or render.text_alignment != 'left' or len(content) > chars_max:
-        if offset[0] > 0 and render.text_alignment == 'left':
-            offset[0] = 0
-            offset[1] += new_offset[1] + int(render.font_size * 0.25)
-
-        textdata = word_wrap(layer, render, content, layer.width, layer.height - offset[1])
-        content = textdata[0]
+    if layout_key in text_layout_cache:
+        cache_hits['text_layout'] += 1
+    else:
+        text_layout_cache[layout_key] = fit_text_multiline(content, layer, size, list(offset), render, mod)
 
-        if textdata[1] != render.font_size:
-            render.font_size = textdata[1]
+    text_ops, final_offset, new_offset = text_layout_cache[layout_key]
+    requested_size = render.font_size
 
-        render.text(int(offset[0]), int(render.font_size + offset[1]), content)
+    for font_size, pos_x, pos_y, text in text_ops:
+        render.font_size = font_size
+        render.text(pos_x, pos_y - first_row, text)
 
-        if '\n' in content:
-            metrics = render.get_font_metrics(layer, content, True)
-        else:
-            metrics = render.get_font_metrics(layer, content, False)
+    offset[0], offset[1] = final_offset
 
-        new_offset = [metrics.text_width, metrics.text_height]
+    if render.font_size < requested_size:
+        log_event('warning', None, kind='font_shrunk', text=content[:40], requested=requested_size,
+                  fitted=render.font_size)
 
-    else:
-        # Fill up the prefixed line first
-        textdata = word_wrap(layer, render, content, layer.width - offset[0], layer.height - offset[1])
-        content_fl = textdata[0]
+    return list(new_offset)
 
-        if textdata[1] != render.font_size:
-            render.font_size = textdata[1]
 
-        content_fl = content_fl.partition('\n')[0]
-        render.text(int(offset[0]), int(render.font_size + offset[1]), content_fl)
-        metrics = render.get_font_metrics(layer, content_fl, False)
+def render_text_tile(text: str, render: Drawing, offset: list, module: str) -> Image:
+    """
+    Returns a zone-sized layer containing a single line of text (like the number of an array entry). Layers are
+    shared by all cards of a build, so each combination of text, font style and zone is only rendered once.
 
-        if len(content) > len(content_fl):
-            # render what's left normally and calculate the height of both text blocks
-            textdata = word_wrap(layer, render, content[len(content_fl):].strip(), layer.width,
-                                 layer.height - offset[1])
-            content_rest = textdata[0]
+    Parameters
+    ----------
+        text : str
+            The text
+        render : Drawing
+            The wand.Drawing object defining the font style (is not modified)
+        offset : list
+            The text's offset [x, y] inside the zone
+        module : str
+            The name of the current module
 
-            if textdata[1] != render.font_size:
-                render.font_size = textdata[1]
+    Returns
+    -------
+        Image
+            The rendered layer (shared, must not be modified)
+    """
+    dimensions = layout['modules'][module + '_zone_dimensions']
+    key = (text, render.font, render.font_size, str(render.fill_color), str(render.stroke_color), render.stroke_width,
+           render.text_alignment, render.text_decoration, tuple(dimensions), int(offset[0]),
+           int(render.font_size + offset[1]))
+
+    if key in tile_cache:
+        cache_hits['tile'] += 1
+        tile_cache.move_to_end(key)
+    else:
+        with Color('transparent') as bg:
+            tile = Image(width=dimensions[0], height=dimensions[1], background=bg)
 
-            render.text(0, int(2.2 * render.font_size + offset[1]), content_rest)
+        with Drawing(render) as gfx:
+            gfx.text(int(offset[0]), int(render.font_size + offset[1]), text)
+            gfx.draw(tile)
 
-            if '\n' in content_rest:
-                metrics_rest = render.get_font_metrics(layer, content_rest, False)
-            else:
-                metrics_rest = render.get_font_metrics(layer, content_rest, False)
+        tile_cache[key] = tile
 
-            new_offset = [0, metrics.text_height + metrics_rest.text_height]
+        while len(tile_cache) > tile_cache_size:
+            tile_cache.popitem(last=False)
 
-    return new_offset
+    return tile_cache[key]
 
 
 def resolve_meta_tags(string: str, language="") -> str:
@@ -827,21 +2404,245 @@ def resolve_meta_tags(string: str, language="") -> str:
         str
             Text with replaced meta tags
     """
-    meta_tags = ['{', '}']
-    has_meta_tags = all([char in string for char in meta_tags])
+    tokens = compile_meta_template(string)
+
+    if len(tokens) == 1 and isinstance(tokens[0], str):
+        return string
+
+    values = get_meta_values(language)
+    parts = []
+
+    for token in tokens:
+        if isinstance(token, str):
+            parts.append(token)
+        elif token[1] in values:
+            parts.append(values[token[1]])
+        elif token[1] == 'title':
+            values['title'] = str(get_card_content(language, "title"))
+            parts.append(values['title'])
+        else:
+            parts.append(token[0])
+
+    return "".join(parts)
+
+
+def save_output(image: Image, filename: str, image_format: str) -> str:
+    """
+    Saves a rendered card into the dist directory unless an identical output already exists. The decision is based
+    on a digest of the final pixels: identical outputs (e.g. language variants without translated texts or reprints)
+    are encoded only once and hard-linked (or copied) to their other filenames, unchanged outputs are not written
+    again at all.
+
+    Parameters
+    ----------
+        image : Image
+            The rendered card
+        filename : str
+            The output's filename (relative to the dist directory)
+        image_format : str
+            The output file format
+
+    Returns
+    -------
+        str
+            The filename of the identical output the file was linked to, or an empty string if it was encoded
+    """
+    with image.clone() as pixels:
+        digest = hashlib.sha256(f"{image.width}x{image.height}:{image.colorspace}:{image_format}:".encode('utf-8'))
+        digest.update(pixels.make_blob('CMYK' if image.colorspace == 'cmyk' else 'RGBA'))
+        digest = digest.hexdigest()
+
+    target = distpath + filename
+    original = find_output(digest)
+
+    if original == filename:
+        return ""
+    elif original:
+        link_output(original, filename)
+        return original
+
+    # never write into an existing file: it may be hard-linked to other outputs
+    if os.path.exists(target):
+        os.remove(target)
+
+    image.save(filename=target)
+    register_output(digest, filename)
+
+    return ""
+
+
+def save_output_bands(bands, filename: str, image_format: str, width: int, height: int, cmyk: bool,
+                      dpi: float) -> str:
+    """
+    Streams the bands of a card rendered in high resolution mode into the output file. The pixel digest is
+    calculated while encoding; if an identical output already exists, the new file is replaced by a link to it
+    (see save_output).
+
+    Parameters
+    ----------
+        bands
+            An iterable of raw pixel rows (8 bit RGBA or CMYK), one bytes object per band
+        filename : str
+            The output's filename (relative to the dist directory)
+        image_format : str
+            The output file format ('png' or 'tif')
+        width : int
+            The width of the card in pixels
+        height : int
+            The height of the card in pixels
+        cmyk : bool
+            Defines if the bands contain CMYK instead of RGBA pixels
+        dpi : float
+            The resolution stored in the output file
+
+    Returns
+    -------
+        str
+            The filename of the identical output the file was linked to, or an empty string if it was kept
+    """
+    digest = hashlib.sha256(f"{width}x{height}:{'cmyk' if cmyk else 'srgb'}:{image_format}:bands:".encode('utf-8'))
+    target = distpath + filename
+
+    def hashed_bands():
+        """Passes all bands on to the encoder while updating the digest."""
+        for band in bands:
+            digest.update(band)
+            yield band
+
+    if image_format == 'png':
+        write_png(target + '.part', width, height, hashed_bands(), dpi)
+    else:
+        write_tiff(target + '.part', width, height, hashed_bands(), cmyk, dpi)
+
+    digest = digest.hexdigest()
+    original = find_output(digest)
+
+    if original == filename:
+        os.remove(target + '.part')
+        return ""
+    elif original:
+        os.remove(target + '.part')
+        link_output(original, filename)
+        return original
+
+    os.replace(target + '.part', target)
+    register_output(digest, filename)
+
+    return ""
+
+
+def scale_layout(card_layout: dict, factor: float) -> dict:
+    """
+    Returns a copy of a layout with all zone coordinates, zone dimensions and the template size scaled.
+
+    Parameters
+    ----------
+        card_layout : dict
+            The layout preset (is not modified)
+        factor : float
+            The scale factor
+
+    Returns
+    -------
+        dict
+            The scaled layout
+    """
+    def scale(value):
+        """Scales all numbers of a (nested) list."""
+        if isinstance(value, list):
+            return [scale(item) for item in value]
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            return int(round(value * factor))
+        else:
+            return value
+
+    scaled = copy.deepcopy(card_layout)
+    scaled['template']['size'] = scale(scaled['template']['size'])
+
+    for section in ['config', 'modules']:
+        for key in scaled[section]:
+            scaled[section][key] = scale(scaled[section][key])
+
+    return scaled
+
+
+def setup_worker(settings_file: str) -> None:
+    """
+    Loads the project settings inside a render worker process (see cardmage.server).
+
+    Parameters
+    ----------
+        settings_file : str
+            The path of the project's settings file
+    """
+    global base_dir
+    global distpath
+    global settings
+
+    settings = toml.load(dir_path(settings_file))
+    base_dir = settings['paths']['base']
+    distpath = os.path.join(base_dir, 'dist/')
+
+
+def shard_spec(string: str) -> tuple:
+    """
+    Parses the value of the '--shard' command line option.
+
+    Parameters
+    ----------
+        string : str
+            The shard specification in the format 'K/N'
+
+    Returns
+    -------
+        tuple
+            The shard number and the total amount of shards (K, N)
+
+    Raises
+    ------
+        argparse.ArgumentTypeError
+            Raised if the specification is malformed or K is not within 1 to N
+    """
+    match = re.fullmatch(r'(\d+)/(\d+)', string.strip())
 
-    if has_meta_tags:
-        content_parts = re.findall(r'\{.*?}', string)
+    if not match or not 1 <= int(match.group(1)) <= int(match.group(2)):
+        raise argparse.ArgumentTypeError(f"invalid shard '{string}' (expected K/N with 1 <= K <= N)")
 
-        for tag in content_parts:
-            meta_key = tag.replace('{', '').replace('}', '')
+    return int(match.group(1)), int(match.group(2))
 
-            if meta_key in blueprint['meta']:
-                string = string.replace(tag, get_card_content(language, " ".join(["meta", meta_key])))
-            elif meta_key == 'title':
-                string = string.replace(tag, get_card_content(language, "title"))
 
-    return string
+def shift_layout(card_layout: dict, top: int, rows: int) -> dict:
+    """
+    Returns a copy of a layout moved upwards by the given amount of rows and cut to the given height. Used for
+    rendering a single band of a card (see render_card_bands).
+
+    Parameters
+    ----------
+        card_layout : dict
+            The layout (is not modified)
+        top : int
+            The first row of the band
+        rows : int
+            The height of the band
+
+    Returns
+    -------
+        dict
+            The shifted layout
+    """
+    shifted = copy.deepcopy(card_layout)
+    shifted['template']['size'] = [shifted['template']['size'][0], rows]
+    shifted['config']['title_zone'][1] -= top
+
+    for key, zones in shifted['modules'].items():
+        if key.endswith('_zone'):
+            if isinstance(zones[0], (int, float)):
+                zones[1] -= top
+            else:
+                for zone in zones:
+                    zone[1] -= top
+
+    return shifted
 
 
 def word_wrap(image: Image, ctx: Drawing, text: str, roi_width: int, roi_height: int) -> list:
@@ -872,6 +2673,17 @@ def word_wrap(image: Image, ctx: Drawing, text: str, roi_width: int, roi_height:
         RuntimeError
             Raised if the function runs out of attempts given for fitting the text into the box
     """
+    fit_key = ('wrap', text, ctx.font, ctx.font_size, ctx.stroke_width, roi_width, roi_height)
+
+    if fit_key in text_layout_cache:
+        cache_hits['text_layout'] += 1
+        mutable_message, font_size = text_layout_cache[fit_key]
+
+        if font_size != ctx.font_size:
+            ctx.font_size = font_size
+
+        return [mutable_message, font_size]
+
     mutable_message = text
     iteration_attempts = 30
 
@@ -911,8 +2723,180 @@ def word_wrap(image: Image, ctx: Drawing, text: str, roi_width: int, roi_height:
     if iteration_attempts < 1:
         raise RuntimeError("Unable to calculate word_wrap for " + text)
 
+    text_layout_cache[fit_key] = (mutable_message, ctx.font_size)
+
     return [mutable_message, ctx.font_size]
 
 
+def write_output_index() -> None:
+    """Stores the pixel digests of all outputs inside the dist directory for later builds."""
+    with open(distpath + '.cardmage-index.toml', 'w', encoding='utf-8') as file:
+        toml.dump(dict(outputs=output_index), file)
+
+
+def write_png(filename: str, width: int, height: int, bands, dpi: float) -> None:
+    """
+    Writes an 8 bit RGBA PNG file from a stream of pixel rows without keeping the whole image in memory.
+
+    Parameters
+    ----------
+        filename : str
+            The path of the output file
+        width : int
+            The width of the image in pixels
+        height : int
+            The height of the image in pixels
+        bands
+            An iterable of raw RGBA pixel rows, one bytes object per band
+        dpi : float
+            The resolution stored in the file
+    """
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        """Encodes a PNG chunk."""
+        return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff)
+
+    stride = width * 4
+    compressor = zlib.compressobj(6)
+
+    with open(filename, 'wb') as file:
+        file.write(b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)))
+        # physical pixel size in pixels per metre (unit 1)
+        file.write(chunk(b'pHYs', struct.pack('>IIB', round(dpi / 0.0254), round(dpi / 0.0254), 1)))
+
+        for band in bands:
+            # each row starts with its filter type (0: none)
+            data = compressor.compress(b''.join(b'\x00' + band[row:row + stride]
+                                                for row in range(0, len(band), stride)))
+
+            if data:
+                file.write(chunk(b'IDAT', data))
+
+        file.write(chunk(b'IDAT', compressor.flush()) + chunk(b'IEND', b''))
+
+
+def write_shard_manifest(shard: tuple, deck: list, outputs: dict, duplicates: dict, failed: list) -> None:
+    """
+    Writes the partial manifest of a sharded build into the dist directory.
+
+    Parameters
+    ----------
+        shard : tuple
+            The shard number and the total amount of shards (K, N)
+        deck : list
+            The names of all cards of the deck
+        outputs : dict
+            The output filenames rendered for each card of this shard
+        duplicates : dict
+            Outputs linked to an identical output instead of being encoded (filename -> original filename)
+        failed : list
+            The filenames of all cards that could not be built
+    """
+    manifest = dict(shard=dict(index=shard[0], count=shard[1], deck=deck, cards=list(outputs.keys()), failed=failed,
+                               outputs=outputs, duplicates=duplicates))
+
+    with open(distpath + f"manifest-{shard[0]}-of-{shard[1]}.toml", 'w', encoding='utf-8') as file:
+        toml.dump(manifest, file)
+
+
+def write_tiff(filename: str, width: int, height: int, bands, cmyk: bool, dpi: float) -> None:
+    """
+    Writes an uncompressed 8 bit TIFF file (CMYK or RGBA) from a stream of pixel rows without keeping the whole
+    image in memory. Each band is stored as a single strip.
+
+    Parameters
+    ----------
+        filename : str
+            The path of the output file
+        width : int
+            The width of the image in pixels
+        height : int
+            The height of the image in pixels
+        bands
+            An iterable of raw pixel rows (CMYK or RGBA), one bytes object per band
+        cmyk : bool
+            Defines if the bands contain CMYK instead of RGBA pixels
+        dpi : float
+            The resolution stored in the file
+    """
+    stride = width * 4
+    pending = iter(bands)
+    first = next(pending)
+    rows_per_strip = max(1, len(first) // stride)
+    strips = [min(rows_per_strip, height - top) * stride for top in range(0, height, rows_per_strip)]
+
+    # tag, type (3: SHORT, 4: LONG, 5: RATIONAL), count, value; arrays are stored behind the directory
+    entries = [(256, 4, 1, width), (257, 4, 1, height), (258, 3, 4, None), (259, 3, 1, 1),
+               (262, 3, 1, 5 if cmyk else 2), (273, 4, len(strips), None), (277, 3, 1, 4),
+               (278, 4, 1, rows_per_strip), (279, 4, len(strips), None), (282, 5, 1, None), (283, 5, 1, None),
+               (284, 3, 1, 1), (296, 3, 1, 2)]
+
+    if not cmyk:
+        entries.append((338, 3, 1, 2))  # extra sample: unassociated alpha
+
+    arrays_offset = 8 + 2 + len(entries) * 12 + 4
+    data_offset = arrays_offset + 8 + len(strips) * 8 + 16
+    offsets = [data_offset + sum(strips[:index]) for index in range(len(strips))]
+    # resolution in pixels per inch (unit 2)
+    resolution = struct.pack('<II', round(dpi * 100), 100)
+    arrays = {258: struct.pack('<4H', 8, 8, 8, 8), 273: struct.pack(f'<{len(strips)}I', *offsets),
+              279: struct.pack(f'<{len(strips)}I', *strips), 282: resolution, 283: resolution}
+
+    directory = struct.pack('<H', len(entries))
+    position = arrays_offset
+
+    for tag, value_type, count, value in entries:
+        if tag in arrays and len(arrays[tag]) > 4:
+            directory += struct.pack('<HHII', tag, value_type, count, position)
+            position += len(arrays[tag])
+        elif tag in arrays:
+            directory += struct.pack('<HHI', tag, value_type, count) + arrays[tag].ljust(4, b'\x00')
+        elif value_type == 3:
+            directory += struct.pack('<HHIHH', tag, value_type, count, value, 0)
+        else:
+            directory += struct.pack('<HHII', tag, value_type, count, value)
+
+    with open(filename, 'wb') as file:
+        file.write(b'II*\x00' + struct.pack('<I', 8) + directory + struct.pack('<I', 0))
+
+        for tag, value_type, count, value in entries:
+            if tag in arrays and len(arrays[tag]) > 4:
+                file.write(arrays[tag])
+
+        file.write(b'\x00' * (data_offset - file.tell()))
+        file.write(first)
+
+        for band in pending:
+            file.write(band)
+
+
+
+def zone_layer(module: str, top: int) -> tuple:
+    """
+    Returns a transparent layer for a module's zone. Only the rows of the zone inside the current canvas are
+    allocated, so in high resolution mode the layers of large zones never exceed the height of a band (see
+    render_card_bands).
+
+    Parameters
+    ----------
+        module : str
+            The name of the current module
+        top : int
+            The zone's vertical position on the current canvas
+
+    Returns
+    -------
+        tuple
+            The layer and the first row of the zone it covers
+    """
+    width, height = layout['modules'][module + '_zone_dimensions']
+    first_row = min(max(0, -int(top)), height)
+    last_row = min(height, layout['template']['size'][1] - int(top))
+
+    with Color('transparent') as bg:
+        layer = Image(width=width, height=max(1, last_row - first_row), background=bg)
+
+    return layer, first_row
+
+
 if __name__ == "__main__":
     cl_main()
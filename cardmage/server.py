@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+
+"""
+cardmage render server: renders card definitions sent via HTTP on demand.
+
+Each worker process loads the project settings once and keeps presets and decoded images cached between requests.
+Identical requests arriving at the same time are rendered only once, recent results are answered from memory.
+"""
+
+import argparse
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+import toml
+from wand.exceptions import WandException
+import cardmage
+
+content_types = {'png': 'image/png', 'qoi': 'image/qoi', 'tif': 'image/tiff'}
+# seconds the modification time of the project's assets is reused before the files are checked again
+assets_check_interval = 1.0
+
+
+def serve_main(argv: list) -> None:
+    """
+    Entrypoint of the 'cardmage serve' command.
+
+    Parameters
+    ----------
+        argv : list
+            The command line arguments following 'serve'
+    """
+    arg_parser = argparse.ArgumentParser(prog='cardmage serve', description='Cardmage local render server')
+    arg_parser.add_argument("--host", help="Interface to listen on", default="127.0.0.1", action="store")
+    arg_parser.add_argument("--port", help="Port to listen on", default=8750, type=int, action="store")
+    arg_parser.add_argument("-w", "--workers", help="Amount of render worker processes", default=os.cpu_count() or 1,
+                            type=int, action="store")
+    arg_parser.add_argument("-c", "--cache-size", help="Amount of rendered images kept in memory", default=64,
+                            type=int, action="store")
+    arg_parser.add_argument("--cors-origin", help="Origin of a browser based editor allowed to use the server, e.g. "
+                                                  "'http://localhost:3000' or '*' (repeatable)", metavar="ORIGIN",
+                            action="append", default=[])
+    arg_parser.add_argument("-t", "--test", help="Use test settings", default=False, action="store_true")
+
+    args = arg_parser.parse_args(argv)
+
+    if args.test:
+        settings_file = "../testdata/settings.toml"
+    else:
+        settings_file = "./settings.toml"
+
+    try:
+        cardmage.setup_worker(settings_file)
+    except FileNotFoundError:
+        print("The projects' settings file could not be loaded (file does not exist).")
+        return
+    except toml.TomlDecodeError:
+        print("The projects' settings file could not be loaded (wrong file format).")
+        return
+
+    pool = ProcessPoolExecutor(max_workers=max(1, args.workers), initializer=cardmage.setup_worker,
+                               initargs=(settings_file,))
+    server = ThreadingHTTPServer((args.host, args.port), RenderRequestHandler)
+    server.pool = pool
+    server.renders = OrderedDict()
+    server.renders_size = max(0, args.cache_size)
+    server.pending = dict()
+    server.lock = threading.Lock()
+    server.cors_origins = args.cors_origin
+    server.assets_mtime = 0
+    server.assets_checked = None
+
+    print(f"Render server listening on http://{args.host}:{args.port}/render ({args.workers} workers). "
+          "Press Ctrl+C to stop.")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        pool.shutdown(cancel_futures=True)
+
+
+def parse_request(body: bytes, content_type: str, query: dict) -> tuple:
+    """
+    Extracts the card definition and render options of a render request.
+
+    Parameters
+    ----------
+        body : bytes
+            The request body containing a card definition as TOML or JSON (optionally including a 'translations'
+            section like a translation file)
+        content_type : str
+            The request's content type
+        query : dict
+            The parsed query string ('language', 'format' and 'print' are supported)
+
+    Returns
+    -------
+        tuple
+            The card definition, its translations, the language, the image format and the print flag
+
+    Raises
+    ------
+        ValueError
+            Raised if the request is malformed
+    """
+    text = body.decode('utf-8')
+
+    if 'json' in content_type:
+        card_data = json.loads(text)
+    else:
+        try:
+            card_data = toml.loads(text)
+        except toml.TomlDecodeError as error:
+            raise ValueError(f"invalid TOML: {error}")
+
+    if not isinstance(card_data, dict):
+        raise ValueError("the request body must contain a single card definition")
+
+    card_translations = card_data.pop('translations', None)
+    language = query.get('language', [''])[0].lower()
+    image_format = query.get('format', ['png'])[0].lower()
+    print_mode = query.get('print', ['0'])[0].lower() in ['1', 'true', 'yes']
+
+    if image_format not in content_types:
+        raise ValueError(f"unsupported format '{image_format}'")
+
+    return card_data, card_translations, language, image_format, print_mode
+
+
+class RenderRequestHandler(BaseHTTPRequestHandler):
+    """Answers 'POST /render' requests with the rendered card image."""
+
+    def do_OPTIONS(self) -> None:
+        # CORS preflight of browser based editors (e.g. for JSON requests)
+        self.send_response(204)
+        self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Access-Control-Max-Age', '600')
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_POST(self) -> None:
+        url = urlparse(self.path)
+
+        if url.path != '/render':
+            self.send_text(404, "Unknown endpoint; use POST /render")
+            return
+
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        query = parse_qs(url.query)
+
+        try:
+            request = parse_request(body, self.headers.get('Content-Type', ''), query)
+        except (ValueError, UnicodeDecodeError) as error:
+            self.send_text(400, str(error))
+            return
+
+        # edited presets or images change the key, so outdated renders are never answered from memory
+        key = hashlib.sha256(json.dumps([request, self.assets_mtime()], sort_keys=True,
+                                        default=str).encode('utf-8')).hexdigest()
+        cache_status = 'hit'
+
+        try:
+            with self.server.lock:
+                image = self.server.renders.get(key)
+
+                if image is not None:
+                    self.server.renders.move_to_end(key)
+                elif key in self.server.pending:
+                    # an identical request is already being rendered: wait for its result instead
+                    future = self.server.pending[key]
+                    cache_status = 'coalesced'
+                else:
+                    future = self.server.pool.submit(cardmage.render_blueprint, *request)
+                    self.server.pending[key] = future
+                    cache_status = 'miss'
+        except Exception as error:
+            # e.g. a broken worker pool
+            self.send_text(500, f"Render server error: {error!r}")
+            return
+
+        if image is None:
+            try:
+                image = future.result()
+            except (FileNotFoundError, IndexError, KeyError, RuntimeError, TypeError, ValueError,
+                    WandException) as error:
+                self.send_text(422, f"Card could not be rendered: {error!r}")
+                return
+            except Exception as error:
+                self.send_text(500, f"Render server error: {error!r}")
+                return
+            else:
+                with self.server.lock:
+                    if self.server.renders_size > 0:
+                        self.server.renders[key] = image
+
+                        while len(self.server.renders) > self.server.renders_size:
+                            self.server.renders.popitem(last=False)
+            finally:
+                # failed renders are forgotten as well, so identical requests are rendered again
+                with self.server.lock:
+                    if self.server.pending.get(key) is future:
+                        del self.server.pending[key]
+
+        self.send_response(200)
+        self.send_header('Content-Type', content_types['tif' if request[4] else request[3]])
+        self.send_header('Content-Length', str(len(image)))
+        self.send_header('X-Cardmage-Cache', cache_status)
+        self.end_headers()
+        self.wfile.write(image)
+
+    def assets_mtime(self) -> int:
+        """Returns the modification time of the project's assets; the files are checked at most once per interval."""
+        with self.server.lock:
+            now = time.monotonic()
+
+            if self.server.assets_checked is None or now - self.server.assets_checked >= assets_check_interval:
+                self.server.assets_mtime = cardmage.assets_mtime()
+                self.server.assets_checked = now
+
+            return self.server.assets_mtime
+
+    def end_headers(self) -> None:
+        """Adds the CORS headers for allowed origins to every response."""
+        origins = self.server.cors_origins
+
+        if '*' in origins:
+            self.send_header('Access-Control-Allow-Origin', '*')
+        elif self.headers.get('Origin') in origins:
+            self.send_header('Access-Control-Allow-Origin', self.headers['Origin'])
+
+        if origins:
+            self.send_header('Access-Control-Expose-Headers', 'X-Cardmage-Cache')
+            self.send_header('Vary', 'Origin')
+
+        super().end_headers()
+
+    def send_text(self, status: int, message: str) -> None:
+        """Sends a plain text response."""
+        data = message.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+
+"""
+cardmage snapshot suite: renders all cards of a project (including their translations and print versions) and
+compares them to previously approved golden images.
+
+Images are compared as small box-filtered thumbnails, so minor anti-aliasing differences stay below the tolerances
+while changed texts, missing icons or shifted zones are reported. Cards are rendered and compared in parallel.
+Golden images are named like the outputs of a regular build (e.g. 'TES-032DE.png'), so the outputs of complete command
+line builds - rendered in bands, with linked duplicates or from a bulk card source - are validated against the same
+reference renders.
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import toml
+from wand.color import Color
+from wand.image import Image
+import cardmage
+
+# command line builds validated against the golden images of the single renders (name: options)
+build_variants = {
+    'build': ['-l'],
+    'banded': ['-l', '--scale', '2', '--band-height', '128'],
+    'banded-print': ['-l', '-p', '--scale', '2', '--band-height', '128'],
+}
+
+
+def snapshot_main(argv: list) -> None:
+    """
+    Entrypoint of the 'cardmage snapshot' command.
+
+    Parameters
+    ----------
+        argv : list
+            The command line arguments following 'snapshot'
+    """
+    arg_parser = argparse.ArgumentParser(prog='cardmage snapshot', description='Cardmage snapshot regression suite')
+    arg_parser.add_argument("path", nargs="*", help="Card files to check. Leave empty to check all cards found in "
+                                                    "the card directory")
+    arg_parser.add_argument("-u", "--update", help="Approve the current renders as new golden images",
+                            default=False, action="store_true")
+    arg_parser.add_argument("-w", "--workers", help="Amount of render worker processes", default=os.cpu_count() or 1,
+                            type=int, action="store")
+    arg_parser.add_argument("--size", help="Edge length of the thumbnails compared (in pixels)", default=64,
+                            type=int, action="store")
+    arg_parser.add_argument("--mean", help="Tolerated mean difference of all thumbnail pixels (0-1)", default=0.005,
+                            type=float, action="store")
+    arg_parser.add_argument("--max", help="Tolerated difference of a single thumbnail pixel (0-1)", default=0.1,
+                            type=float, action="store")
+    arg_parser.add_argument("-s", "--source", help="Build the cards of a bulk card source and validate them as well",
+                            action="store")
+    arg_parser.add_argument("-t", "--test", help="Use test settings", default=False, action="store_true")
+
+    args = arg_parser.parse_args(argv)
+
+    if args.test:
+        settings_file = "../testdata/settings.toml"
+    else:
+        settings_file = "./settings.toml"
+
+    try:
+        cardmage.setup_worker(settings_file)
+    except FileNotFoundError:
+        print("The projects' settings file could not be loaded (file does not exist).")
+        sys.exit(2)
+    except toml.TomlDecodeError:
+        print("The projects' settings file could not be loaded (wrong file format).")
+        sys.exit(2)
+
+    golden_dir = os.path.join(cardmage.base_dir, 'snapshots/')
+    cards = args.path or sorted(os.listdir(cardmage.base_dir + cardmage.settings['paths']['cards']))
+    cases = [case for card in cards for case in snapshot_cases(card)]
+    builds = dict()
+
+    # builds are only validated against approved golden images, never approved themselves
+    if not args.update:
+        builds = {variant: options + args.path for variant, options in build_variants.items()}
+
+        if args.source:
+            builds['bulk'] = ['-l', '-s', os.path.abspath(args.source)]
+
+    if len(cases) == 0:
+        print("No definition files found inside the card directory; therefore nothing to do.")
+        sys.exit(2)
+
+    # renders of failed snapshots are only kept until the next run
+    shutil.rmtree(golden_dir + 'failed/', ignore_errors=True)
+    os.makedirs(golden_dir + 'failed/')
+    suite_start = time.perf_counter()
+    results = []
+
+    with ProcessPoolExecutor(max_workers=max(1, args.workers), initializer=cardmage.setup_worker,
+                             initargs=(settings_file,)) as pool:
+        jobs = [(snapshot_label(*case), pool.submit(check_snapshot, *case, golden_dir, args.update, args.size))
+                for case in cases]
+        jobs += [(variant + '/', pool.submit(check_build, variant, options, args.test, golden_dir, args.size))
+                 for variant, options in builds.items()]
+
+        for name, future in jobs:
+            # a crashing case (or worker) is reported like any other error instead of aborting the whole suite
+            try:
+                outcome = future.result()
+            except Exception as error:
+                outcome = dict(name=name, status='error', error=repr(error))
+
+            for result in outcome if isinstance(outcome, list) else [outcome]:
+                results.append(result)
+
+                if result['status'] == 'checked':
+                    passed = result['mean'] <= args.mean and result['max'] <= args.max
+                    result['status'] = 'passed' if passed else 'failed'
+
+                    if not passed:
+                        os.replace(result['render'], golden_dir + 'failed/' + result['name'].replace('/', '-'))
+                    else:
+                        os.remove(result['render'])
+
+                details = ""
+
+                if 'mean' in result:
+                    details = f" (mean {result['mean']:.2%}, max {result['max']:.2%})"
+                elif 'error' in result:
+                    details = f" ({result['error']})"
+
+                print(f"  - {result['status'].upper()}: {result['name']}{details}")
+
+    statuses = [result['status'] for result in results]
+    print(f"{len(results)} snapshots in {time.perf_counter() - suite_start:.1f} s: {statuses.count('passed')} passed, "
+          f"{statuses.count('failed')} failed, {statuses.count('error')} errors, {statuses.count('missing')} missing, "
+          f"{statuses.count('updated')} updated")
+
+    if statuses.count('failed') > 0:
+        print(f"The renders of failed snapshots can be found in '{golden_dir}failed/'.")
+
+    if statuses.count('missing') > 0:
+        print("Run 'cardmage snapshot --update' to approve the renders of missing snapshots.")
+
+    sys.exit(1 if any(status in ['failed', 'error', 'missing'] for status in statuses) else 0)
+
+
+def snapshot_cases(card: str) -> list:
+    """
+    Lists the snapshots of a card: the untranslated card and each of its translations, each of them in the regular
+    and the print version.
+
+    Parameters
+    ----------
+        card : str
+            The filename of the card's root TOML file
+
+    Returns
+    -------
+        list
+            A (card, language, print mode) tuple per snapshot
+    """
+    languages = ['']
+
+    try:
+        card_data = toml.load(cardmage.base_dir + cardmage.settings['paths']['cards'] + card)
+        card_translations = toml.load(cardmage.base_dir + cardmage.settings['paths']['translations'] + card)
+    except (FileNotFoundError, toml.TomlDecodeError):
+        card_translations = dict()
+    else:
+        for language in card_data.get('card', dict()).get('translations', []):
+            if language.lower() in card_translations.get('translations', dict()):
+                languages.append(language.lower())
+
+    return [(card, language, print_mode) for print_mode in [False, True] for language in languages]
+
+
+def snapshot_label(card: str, language: str, print_mode: bool) -> str:
+    """
+    Returns a readable name of a snapshot, used until the filename of its golden image is known.
+
+    Parameters
+    ----------
+        card : str
+            The filename of the card's root TOML file
+        language : str
+            The target language (empty for the untranslated card)
+        print_mode : bool
+            The snapshot shows the card's print version
+
+    Returns
+    -------
+        str
+            The card's filename followed by the language and print mode, e.g. 'O_OgInfinium.toml (en, print)'
+    """
+    details = [language] if language else []
+
+    if print_mode:
+        details.append('print')
+
+    return card + (f" ({', '.join(details)})" if details else "")
+
+
+def check_snapshot(card: str, language: str, print_mode: bool, golden_dir: str, update: bool, size: int) -> dict:
+    """
+    Renders a single snapshot and compares it to its golden image (runs inside a worker process).
+
+    Parameters
+    ----------
+        card : str
+            The filename of the card's root TOML file
+        language : str
+            The target language (empty for the untranslated card)
+        print_mode : bool
+            Renders the card's print version (CMYK + TIF format)
+        golden_dir : str
+            The directory containing the golden images
+        update : bool
+            Replaces the golden image with the current render
+        size : int
+            Edge length of the compared thumbnails
+
+    Returns
+    -------
+        dict
+            The snapshot's name and status (see compare_snapshot)
+    """
+    try:
+        card_data = toml.load(cardmage.dir_path(cardmage.base_dir + cardmage.settings['paths']['cards'] + card))
+
+        if language:
+            card_translations = toml.load(cardmage.base_dir + cardmage.settings['paths']['translations'] + card)
+        else:
+            card_translations = dict()
+
+        blob = cardmage.render_blueprint(card_data, card_translations.get('translations'), language,
+                                         'tif' if print_mode else 'png', print_mode)
+        # golden images are named like the outputs of a build
+        name = (cardmage.resolve_meta_tags(card_data['card']['code'], language=language) +
+                ("-cmyk.tif" if print_mode else ".png"))
+    except Exception as error:
+        return dict(name=snapshot_label(card, language, print_mode), status='error', error=repr(error))
+
+    return compare_snapshot(name, blob, golden_dir, name, update, size)
+
+
+def check_build(variant: str, options: list, test: bool, golden_dir: str, size: int) -> list:
+    """
+    Builds the cards with the command line interface into a temporary directory and compares every output to the
+    golden image of the same name (runs inside a worker process). Outputs of a different resolution (see --scale)
+    are compared as well, since both images are shrunk to thumbnails first.
+
+    Parameters
+    ----------
+        variant : str
+            The name of the build
+        options : list
+            The command line arguments of the build
+        test : bool
+            Use test settings
+        golden_dir : str
+            The directory containing the golden images
+        size : int
+            Edge length of the compared thumbnails
+
+    Returns
+    -------
+        list
+            The results of all outputs (see compare_snapshot) and of all cards that failed to build
+    """
+    results = []
+    outputs = []
+    # the package is made importable for the build even if cardmage isn't installed
+    package_dir = os.path.dirname(os.path.dirname(os.path.abspath(cardmage.__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [package_dir, os.environ.get('PYTHONPATH')])))
+
+    with tempfile.TemporaryDirectory() as dist:
+        command = [sys.executable, '-m', 'cardmage', '--log-format', 'jsonl', '--dist', dist] + (['-t'] if test else [])
+        process = subprocess.run(command + options, capture_output=True, text=True, env=env)
+
+        for line in process.stdout.splitlines():
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+
+            if event.get('event') in ['card_failed', 'error']:
+                name = variant + '/' + event.get('card', '')
+                results.append(dict(name=name, status='error', error=event.get('error') or event.get('message')))
+            elif event.get('event') == 'stage' and event.get('stage') == 'save':
+                outputs.append(event['file'])
+
+        if process.returncode != 0:
+            error = (process.stderr.strip().splitlines() or [f"exit status {process.returncode}"])[-1]
+            results.append(dict(name=variant + '/', status='error', error=error))
+
+        for filename in outputs:
+            with open(os.path.join(dist, filename), 'rb') as file:
+                results.append(compare_snapshot(variant + '/' + filename, file.read(), golden_dir, filename, False,
+                                                size))
+
+    return results
+
+
+def compare_snapshot(name: str, blob: bytes, golden_dir: str, golden: str, update: bool, size: int) -> dict:
+    """
+    Compares a render to a golden image (or approves it as new golden image).
+
+    Parameters
+    ----------
+        name : str
+            The name of the snapshot
+        blob : bytes
+            The encoded render
+        golden_dir : str
+            The directory containing the golden images
+        golden : str
+            The filename of the golden image
+        update : bool
+            Replaces the golden image with the render
+        size : int
+            Edge length of the compared thumbnails
+
+    Returns
+    -------
+        dict
+            The snapshot's name and status ('checked', 'missing', 'updated' or 'error'); checked snapshots contain the
+            mean and maximum difference and the path of the current render as well
+    """
+    result = dict(name=name)
+
+    if update:
+        with open(golden_dir + golden, 'wb') as file:
+            file.write(blob)
+
+        result.update(status='updated')
+        return result
+
+    if not os.path.exists(golden_dir + golden):
+        result.update(status='missing')
+        return result
+
+    try:
+        with Image(blob=blob) as current, Image(filename=golden_dir + golden) as golden_image:
+            # renders in another resolution are compared as long as they show the same section of the card
+            if abs(current.width * golden_image.height / current.height - golden_image.width) > 1:
+                result.update(status='checked', mean=1.0, max=1.0)
+            else:
+                result.update(status='checked', **compare_thumbnails(current, golden_image, size))
+    except Exception as error:
+        result.update(status='error', error=repr(error))
+        return result
+
+    # renders are kept for inspection by the main process if they differ too much
+    result['render'] = golden_dir + 'failed/' + f".{os.getpid()}-" + name.replace('/', '-')
+
+    with open(result['render'], 'wb') as file:
+        file.write(blob)
+
+    return result
+
+
+def compare_thumbnails(current: Image, golden: Image, size: int) -> dict:
+    """
+    Compares two images based on box-filtered thumbnails of the same size (the images may differ in resolution).
+    Transparent pixels are compared against a white background, so differences in invisible colour values are ignored.
+
+    Parameters
+    ----------
+        current : Image
+            The current render (is modified)
+        golden : Image
+            The golden image (is modified)
+        size : int
+            Edge length of the thumbnails
+
+    Returns
+    -------
+        dict
+            The mean and maximum difference of all thumbnail pixels (0-1)
+    """
+    channels = 'CMYK' if golden.colorspace == 'cmyk' else 'RGB'
+    width = min(size, golden.width)
+    height = min(size, golden.height)
+    thumbnails = []
+
+    for image in [current, golden]:
+        if channels == 'RGB':
+            with Color('white') as background:
+                image.background_color = background
+
+            image.alpha_channel = 'remove'
+
+        image.resize(width, height, filter='box')
+        image.depth = 8
+        thumbnails.append(image.make_blob(channels))
+
+    step = len(channels)
+    differences = [max(abs(a - b) for a, b in zip(thumbnails[0][pixel:pixel + step], thumbnails[1][pixel:pixel + step]))
+                   for pixel in range(0, len(thumbnails[0]), step)]
+
+    if len(differences) == 0:
+        return dict(mean=0.0, max=0.0)
+
+    return dict(mean=sum(differences) / len(differences) / 255, max=max(differences) / 255)